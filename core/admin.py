@@ -1,11 +1,201 @@
+"""Admin for the large tables.
+
+The stock changelist counts every row exactly (twice, with the unfiltered
+total), pages with OFFSET and loads related objects row by row, all of
+which get slower as the tables grow. The classes here instead:
+
+- estimate the unfiltered count from MySQL table statistics (elsewhere, an
+  exact count cached for COUNT_CACHE_SECONDS) and stop counting filtered
+  results at COUNT_CAP;
+- page by keyset: "Next page" carries a cursor of the last row's (time, id),
+  so every page is one range scan of an index, however deep;
+- only filter and search on indexed columns, and select_related whatever
+  ``list_display`` prints.
+"""
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import Message, Project, ProjectSkill, Proposal, Review, SkillTag
+from .pagination import cursor_values, encode_cursor, keyset_filter
+from .search import index_project, search_projects
+from .skills import registry as skill_registry
+
+COUNT_CAP = 10000
+COUNT_CACHE_SECONDS = 600
+SEARCH_LIMIT = 500
+CURSOR_VAR = "after"
+
+
+def estimated_count(model, using="default"):
+    table = model._meta.db_table
+    connection = connections[using]
+    if connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return int(row[0])
+    key = f"admin-count:{using}:{table}"
+    count = cache.get(key)
+    if count is None:
+        count = model._default_manager.using(using).count()
+        cache.set(key, count, COUNT_CACHE_SECONDS)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not qs.query.where:
+            return estimated_count(qs.model, qs.db)
+        # COUNT over a LIMITed subquery stops reading at the cap.
+        return qs[:COUNT_CAP].count()
+
+    def page(self, number):
+        # Unlike Paginator.page, don't trust the count to bound the slice:
+        # an estimate may be short of the real number of rows.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class KeysetAdmin(admin.ModelAdmin):
+    """Changelist ordered by ``keyset`` (newest first) and paged by cursor."""
+
+    keyset = ()
+    keyset_descending = True
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    sortable_by = ()  # any other order would be a filesort over the whole table
+    list_per_page = 50
+    change_list_template = "admin/core/keyset_change_list.html"
+
+    def get_ordering(self, request):
+        prefix = "-" if self.keyset_descending else ""
+        return [prefix + f for f in self.keyset]
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        after = getattr(request, "_keyset_after", None)
+        if after is not None:
+            qs = keyset_filter(qs, self.keyset, after, self.keyset_descending)
+        return qs
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def changelist_view(self, request, extra_context=None):
+        # The cursor is not a field lookup, so keep it away from ChangeList.
+        if CURSOR_VAR in request.GET:
+            request.GET = request.GET.copy()
+            after = cursor_values(request.GET.pop(CURSOR_VAR)[0], self.model, self.keyset)
+            if after is not None:
+                request._keyset_after = after
+        response = super().changelist_view(request, extra_context)
+        cl = getattr(response, "context_data", {}).get("cl")
+        if cl is None:
+            return response
+        count = cl.result_count
+        if not cl.queryset.query.where:
+            label = f"about {count}"
+        elif count >= COUNT_CAP:
+            label = f"{COUNT_CAP}+"
+        else:
+            label = str(count)
+        older = None
+        if len(cl.result_list) >= cl.list_per_page and not cl.show_all:
+            last = cl.result_list[len(cl.result_list) - 1]
+            older = cl.get_query_string({CURSOR_VAR: encode_cursor([getattr(last, f) for f in self.keyset])})
+        response.context_data.update({
+            "count_label": label,
+            "older_url": older,
+            "newest_url": cl.get_query_string() if getattr(request, "_keyset_after", None) else None,
+        })
+        return response
+
+
+@admin.register(Project)
+class ProjectAdmin(KeysetAdmin):
+    keyset = ("created_at", "id")
+    list_display = ("id", "title", "client", "status", "budget", "created_at")
+    list_select_related = ("client",)
+    list_filter = ("status", ("created_at", admin.DateFieldListFilter))
+    search_fields = ("title",)
+    search_help_text = "Words from the title, description or skills, or a project id."
+    raw_id_fields = ("client",)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip() or search_term.strip().isdigit():
+            return super().get_search_results(request, queryset, search_term)
+        # The full-text index instead of LIKE '%term%' over every row.
+        ids = [pid for pid, _ in search_projects(search_term, limit=SEARCH_LIMIT)]
+        return queryset.filter(id__in=ids), False
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        project = form.instance
+        index_project(project, skill_registry.names(
+            ProjectSkill.objects.filter(project=project).values_list("skill_id", flat=True)
+        ))
+
+
+@admin.register(Proposal)
+class ProposalAdmin(KeysetAdmin):
+    keyset = ("submitted_at", "id")
+    list_display = ("id", "project", "freelancer", "proposed_price", "status", "submitted_at")
+    list_select_related = ("project", "freelancer")
+    list_filter = ("status", ("submitted_at", admin.DateFieldListFilter))
+    search_fields = ("=freelancer__username",)
+    search_help_text = "A freelancer's exact username, or a proposal id."
+    raw_id_fields = ("project", "freelancer")
+
+
+@admin.register(Message)
+class MessageAdmin(KeysetAdmin):
+    keyset = ("timestamp", "id")
+    list_display = ("id", "sender", "receiver", "short_text", "timestamp")
+    list_select_related = ("sender", "receiver")
+    list_filter = (("timestamp", admin.DateFieldListFilter),)
+    search_fields = ("=sender__username", "=receiver__username")
+    search_help_text = "The exact username of either party, or a message id."
+    raw_id_fields = ("sender", "receiver")
+
+    @admin.display(description="Text")
+    def short_text(self, obj):
+        return obj.text[:80]
 
-# Register your models here.
 
-from .models import Project
+@admin.register(Review)
+class ReviewAdmin(KeysetAdmin):
+    keyset = ("created_at", "id")
+    list_display = ("id", "proposal_id", "freelancer", "rating", "created_at")
+    list_select_related = ("proposal__freelancer",)
+    list_filter = ("rating", ("created_at", admin.DateFieldListFilter))
+    search_fields = ("=proposal__freelancer__username",)
+    search_help_text = "The freelancer's exact username, or a review id."
+    raw_id_fields = ("proposal",)
 
-admin.site.register(Project)
+    @admin.display(description="Freelancer")
+    def freelancer(self, obj):
+        return obj.proposal.freelancer
 
-from .models import SkillTag
 
-admin.site.register(SkillTag)
+@admin.register(SkillTag)
+class SkillTagAdmin(KeysetAdmin):
+    keyset = ("name", "id")
+    keyset_descending = False
+    list_display = ("id", "name")
+    search_fields = ("^name",)
+    search_help_text = "The start of a skill name, or a skill id."
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import messaging, thumbnails  # noqa: F401 - register job handlers
+        from . import checks, metrics, signals  # noqa: F401 - checks registers itself
+        signals.connect()
+        connection_created.connect(metrics.install_execute_wrapper)
+        metrics.instrument_templates()
@@ -0,0 +1,252 @@
+"""Per-view benchmark scenarios, run by ``manage.py benchmark``.
+
+Each scenario drives one route through the Django test client against
+whatever data the database holds (normally ``manage.py seed_data``). The
+fixture picks the heaviest realistic subjects: the client with the most
+projects, the freelancer with the most proposals, the longest chat and so
+on, so the numbers reflect the slow tail rather than an empty account.
+POST scenarios run inside a transaction that is rolled back afterwards.
+"""
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Conversation, CustomUser, Message, Project, Proposal, SkillTag
+from .search import search_terms
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class Scenario:
+    name: str
+    route: str
+    path: str
+    method: str = "get"
+    as_user: str | None = None
+    data: dict = field(default_factory=dict)
+    headers: dict = field(default_factory=dict)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def fixture():
+    """Pick the subjects every scenario is run against."""
+    client = (
+        CustomUser.objects.filter(is_client=True)
+        .annotate(n=Count("project")).order_by("-n", "pk").first()
+    )
+    freelancer = (
+        CustomUser.objects.filter(is_freelancer=True)
+        .annotate(n=Count("proposal")).order_by("-n", "pk").first()
+    )
+    if client is None or freelancer is None:
+        raise LookupError("The benchmark needs at least one client and one freelancer; run seed_data first.")
+    project = (
+        Project.objects.filter(client=client)
+        .annotate(n=Count("proposals")).order_by("-n", "-pk").first()
+    )
+    open_project = Project.objects.filter(status="new").order_by("-created_at", "-pk").first()
+    chat = Conversation.objects.order_by("-message_count").select_related("user_low", "user_high").first()
+    pending = Proposal.objects.filter(status="pending", project__client=client).order_by("-pk").first()
+    reviewable = Proposal.objects.filter(status="accepted", review__isnull=True).select_related("project").first()
+    skill = SkillTag.objects.annotate(n=Count("projects")).order_by("-n", "pk").first()
+    attachment = (
+        Message.objects.exclude(attachment="").exclude(attachment__isnull=True)
+        .select_related("sender").order_by("-id").first()
+    )
+    avatar = CustomUser.objects.exclude(profile_picture="").exclude(profile_picture__isnull=True).order_by("pk").first()
+    term = None
+    if project is not None:
+        term = next(iter(search_terms(project.title)), None)
+    return {
+        "client": client,
+        "freelancer": freelancer,
+        "project": project,
+        "open_project": open_project,
+        "chat": chat,
+        "pending": pending,
+        "reviewable": reviewable,
+        "skill": skill,
+        "attachment": attachment,
+        "avatar": avatar,
+        "term": term or "api",
+    }
+
+
+def scenarios(fx):
+    """One or more scenarios per route in core/urls.py."""
+    freelancer = fx["freelancer"]
+    skill = fx["skill"].name if fx["skill"] else ""
+    s = [
+        Scenario("root", "root", reverse("root")),
+        Scenario("home", "home", reverse("home")),
+        Scenario("register", "register", reverse("register")),
+        Scenario("login", "login", reverse("login")),
+        Scenario("dashboard:client", "dashboard", reverse("dashboard"), as_user="client"),
+        Scenario("dashboard:freelancer", "dashboard", reverse("dashboard"), as_user="freelancer"),
+        Scenario("recommended_projects_api", "recommended_projects_api", reverse("recommended_projects_api"),
+                 as_user="freelancer"),
+        Scenario("post_project:form", "post_project", reverse("post_project"), as_user="client"),
+        Scenario("post_project:submit", "post_project", reverse("post_project"), method="post", as_user="client",
+                 data={"title": "Benchmark project", "description": "Benchmark", "budget": "100",
+                       "skills": [fx["skill"].pk] if fx["skill"] else []}),
+        Scenario("import_projects", "import_projects", reverse("import_projects"), as_user="client"),
+        Scenario("project_list", "project_list", reverse("project_list")),
+        Scenario("project_list:user", "project_list", reverse("project_list"), as_user="freelancer"),
+        Scenario("project_list:skill", "project_list", f"{reverse('project_list')}?skill={skill}&status=new",
+                 as_user="freelancer"),
+        Scenario("project_list:search", "project_list", f"{reverse('project_list')}?q={fx['term']}",
+                 as_user="freelancer"),
+        Scenario("project_list_api", "project_list_api", f"{reverse('project_list_api')}?skill={skill}"),
+        Scenario("project_search_api", "project_search_api",
+                 f"{reverse('project_search_api')}?q={fx['term']}&status=new"),
+        Scenario("inbox", "inbox", reverse("inbox"), as_user="client"),
+        Scenario("view_profile", "view_profile", reverse("view_profile", args=[freelancer.username]),
+                 as_user="client"),
+        Scenario("edit_profile", "edit_profile", reverse("edit_profile", args=[freelancer.username]),
+                 as_user="freelancer"),
+        Scenario("browse_freelancers", "browse_freelancers", reverse("browse_freelancers")),
+        Scenario("browse_freelancers:search", "browse_freelancers",
+                 f"{reverse('browse_freelancers')}?q={skill}", as_user="client"),
+        Scenario("metrics", "metrics", reverse("metrics"),
+                 headers={"HTTP_AUTHORIZATION": f"Bearer {settings.METRICS_TOKEN}"}),
+        Scenario("export:projects", "export", reverse("export", args=["projects", "csv"]),
+                 headers={"HTTP_AUTHORIZATION": f"Bearer {settings.EXPORT_TOKEN}"}),
+        Scenario("export:messages", "export", reverse("export", args=["messages", "ndjson"]),
+                 headers={"HTTP_AUTHORIZATION": f"Bearer {settings.EXPORT_TOKEN}"}),
+    ]
+    if fx["project"]:
+        project = fx["project"]
+        s += [
+            Scenario("project_detail", "project_detail", reverse("project_detail", args=[project.pk]),
+                     as_user="client"),
+            Scenario("view_proposals", "view_proposals", reverse("view_proposals", args=[project.pk]),
+                     as_user="client"),
+            Scenario("view_proposals:fragment", "view_proposals", reverse("view_proposals", args=[project.pk]),
+                     as_user="client", headers={"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}),
+        ]
+    if fx["open_project"]:
+        s.append(Scenario("submit_proposal", "submit_proposal",
+                          reverse("submit_proposal", args=[fx["open_project"].pk]), as_user="freelancer"))
+    if fx["chat"]:
+        chat = fx["chat"]
+        s += [
+            Scenario("chat_detail", "chat_detail", reverse("chat_detail", args=[chat.user_high.username]),
+                     as_user=chat.user_low.username),
+            Scenario("chat_messages", "chat_messages", f"{reverse('chat_messages', args=[chat.user_high.username])}?after=0",
+                     as_user=chat.user_low.username),
+            Scenario("chat_detail:send", "chat_detail", reverse("chat_detail", args=[chat.user_high.username]),
+                     method="post", as_user=chat.user_low.username, data={"text": "benchmark"},
+                     headers={"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}),
+        ]
+    if fx["pending"]:
+        s.append(Scenario("update_proposal_status", "update_proposal_status",
+                          reverse("update_proposal_status", args=[fx["pending"].pk]), method="post",
+                          as_user="client", data={"action": "accept"}))
+    if fx["reviewable"]:
+        s.append(Scenario("submit_review", "submit_review", reverse("submit_review", args=[fx["reviewable"].pk]),
+                          as_user=fx["reviewable"].project.client.username))
+    if fx["attachment"]:
+        s.append(Scenario("message_attachment", "message_attachment",
+                          reverse("message_attachment", args=[fx["attachment"].pk]),
+                          as_user=fx["attachment"].sender.username))
+    if fx["avatar"]:
+        s.append(Scenario("profile_picture", "profile_picture",
+                          reverse("profile_picture", args=[fx["avatar"].username])))
+    # Last, since it ends the shared client's session.
+    s.append(Scenario("logout", "logout", reverse("logout"), as_user="client"))
+    return s
+
+
+def uncovered(scenario_list):
+    """Route names in core/urls.py that no scenario exercises."""
+    from .urls import urlpatterns
+
+    covered = {sc.route for sc in scenario_list}
+    return sorted(p.name for p in urlpatterns if p.name and p.name not in covered)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _client_for(scenario, fx, clients):
+    who = scenario.as_user
+    if who is None:
+        return clients.setdefault(None, Client())
+    if who not in clients:
+        user = fx[who] if who in ("client", "freelancer") else CustomUser.objects.get(username=who)
+        c = Client()
+        c.force_login(user)
+        clients[who] = c
+    return clients[who]
+
+
+def _request(client, scenario):
+    send = getattr(client, scenario.method)
+    if scenario.method == "get":
+        response = send(scenario.path, **scenario.headers)
+        if response.streaming:
+            # Streamed bodies do their work while being consumed.
+            for _ in response.streaming_content:
+                pass
+        return response
+    # Writes are measured, then undone so every iteration sees the same data.
+    response = None
+    try:
+        with transaction.atomic():
+            response = send(scenario.path, scenario.data, **scenario.headers)
+            raise _Rollback
+    except _Rollback:
+        pass
+    return response
+
+
+def run(scenario, fx, clients, iterations, warmup=0):
+    """Time ``scenario``; returns a dict of latency, query and status stats."""
+    client = _client_for(scenario, fx, clients)
+    for _ in range(warmup):
+        _request(client, scenario)
+    latencies, query_counts, sql_times, statuses = [], [], [], {}
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = _request(client, scenario)
+            elapsed = time.perf_counter() - started
+        latencies.append(elapsed * 1000)
+        query_counts.append(len(ctx.captured_queries))
+        sql_times.append(sum(float(q["time"]) for q in ctx.captured_queries) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if scenario.route == "logout":
+            # Logging out drops the session; log back in for the next pass.
+            clients.pop(scenario.as_user, None)
+            client = _client_for(scenario, fx, clients)
+    result = {
+        "route": scenario.route,
+        "method": scenario.method.upper(),
+        "path": scenario.path,
+        "iterations": iterations,
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "latency_ms": {f"p{p}": round(percentile(latencies, p), 3) for p in PERCENTILES},
+        "queries": {"min": min(query_counts), "median": statistics.median(query_counts), "max": max(query_counts)},
+        "sql_ms_median": round(statistics.median(sql_times), 3),
+    }
+    result["latency_ms"]["mean"] = round(statistics.fmean(latencies), 3)
+    result["latency_ms"]["max"] = round(max(latencies), 3)
+    return result
@@ -0,0 +1,114 @@
+"""Reference counts and garbage collection for content-addressed attachments.
+
+Every file stored by core.storage has a Blob row counting the messages that
+point at it; core.signals calls ``acquire`` when a message with an
+attachment is created and ``release`` when it is deleted. Blobs whose count
+has stayed at zero for a grace period are removed by ``collect``, run in
+batches from ``manage.py gc_blobs``.
+
+An upload that reuses an existing file refreshes its mtime before the
+message is saved, and files are only unlinked while their mtime is older
+than the grace period, so a file cannot be collected from under an upload
+that is about to reference it.
+"""
+import os
+import time
+from datetime import timedelta
+
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import Blob
+from .storage import INCOMING_DIR, attachment_storage, digest_of
+
+GRACE = 86400
+BATCH_SIZE = 500
+
+
+def acquire(name, size):
+    """Count one more reference to the blob stored at ``name``."""
+    digest = digest_of(name)
+    if digest is None:
+        return
+    if Blob.objects.filter(digest=digest).update(refcount=F("refcount") + 1, released_at=None):
+        return
+    _, created = Blob.objects.get_or_create(digest=digest, defaults={"size": size, "refcount": 1})
+    if not created:  # inserted concurrently
+        Blob.objects.filter(digest=digest).update(refcount=F("refcount") + 1, released_at=None)
+
+
+def release(name):
+    digest = digest_of(name)
+    if digest is None:
+        return
+    Blob.objects.filter(digest=digest, refcount__gt=0).update(refcount=F("refcount") - 1)
+    Blob.objects.filter(digest=digest, refcount=0, released_at__isnull=True).update(released_at=timezone.now())
+
+
+def collect(storage=attachment_storage, prefix="attachments", grace=GRACE, batch_size=BATCH_SIZE, dry_run=False):
+    """Delete blobs unreferenced for ``grace`` seconds; returns (blobs, bytes) removed."""
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    idle = Blob.objects.filter(refcount=0, released_at__lt=cutoff)
+    if dry_run:
+        totals = idle.aggregate(n=Count("digest"), size=Sum("size"))
+        return totals["n"], totals["size"] or 0
+
+    removed = freed = 0
+    while True:
+        batch = dict(idle.order_by("released_at").values_list("digest", "size")[:batch_size])
+        if not batch:
+            return removed, freed
+        # Conditional, so a blob that gained a reference meanwhile survives.
+        idle.filter(digest__in=list(batch)).delete()
+        kept = set(Blob.objects.filter(digest__in=list(batch)).values_list("digest", flat=True))
+        for digest, size in batch.items():
+            if digest not in kept and _unlink_if_idle(storage.path(_name(prefix, digest)), cutoff.timestamp()):
+                removed += 1
+                freed += size
+
+
+def collect_orphans(storage=attachment_storage, prefix="attachments", grace=GRACE, dry_run=False):
+    """Delete stored files that have no Blob row, e.g. uploads whose message was never saved."""
+    cutoff = time.time() - grace
+    root = storage.path(prefix)
+    removed = freed = 0
+    for shard in _subdirs(root):
+        for sub in _subdirs(os.path.join(root, shard)):
+            directory = os.path.join(root, shard, sub)
+            names = [n for n in os.listdir(directory) if digest_of(n)]
+            known = set(Blob.objects.filter(digest__in=names).values_list("digest", flat=True))
+            for digest in names:
+                if digest in known:
+                    continue
+                path = os.path.join(directory, digest)
+                size = os.path.getsize(path)
+                if (os.path.getmtime(path) < cutoff) if dry_run else _unlink_if_idle(path, cutoff):
+                    removed += 1
+                    freed += size
+    # Leftovers of interrupted uploads.
+    incoming = os.path.join(root, INCOMING_DIR)
+    if os.path.isdir(incoming) and not dry_run:
+        for entry in os.scandir(incoming):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+    return removed, freed
+
+
+def _name(prefix, digest):
+    return f"{prefix}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def _subdirs(path):
+    if not os.path.isdir(path):
+        return []
+    return sorted(e.name for e in os.scandir(path) if e.is_dir() and len(e.name) == 2)
+
+
+def _unlink_if_idle(path, cutoff):
+    try:
+        if os.path.getmtime(path) >= cutoff:
+            return False
+        os.unlink(path)
+    except FileNotFoundError:
+        return False
+    return True
@@ -0,0 +1,114 @@
+"""Generation-counter caching for the read-mostly public pages.
+
+Each kind of data ("projects", "skills", "users", "reviews") has a counter in
+the cache. Cache keys embed the counters they depend on, so bumping a counter
+(done by core.signals after a relevant save commits) makes every dependent
+entry unreachable at once, without having to find and delete keys.
+
+Works with any Django cache backend, including local-memory and file-based.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+
+from . import routing
+
+GENERATIONS = ("projects", "skills", "users", "reviews")
+PAGE_TIMEOUT = 300
+FRAGMENT_TIMEOUT = 600
+
+STAT_KINDS = ("page", "fragment")
+
+
+def _gen_key(name):
+    return f"gen:{name}"
+
+
+def generations(*names):
+    """Current counter for each of ``names``, initialising missing ones."""
+    keys = [_gen_key(n) for n in names]
+    found = cache.get_many(keys)
+    values = {}
+    for name, key in zip(names, keys):
+        value = found.get(key)
+        if value is None:
+            # Seed from the clock rather than 1 so a counter that was evicted
+            # can never come back at a value used by older entries.
+            cache.add(key, time.time_ns(), timeout=None)
+            value = cache.get(key)
+        values[name] = value
+    return values
+
+
+def bump(*names):
+    for name in names:
+        key = _gen_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def version_token(*names):
+    gens = generations(*names)
+    return ".".join(str(gens[n]) for n in names)
+
+
+def record(kind, hit):
+    key = f"stats:{kind}:{'hit' if hit else 'miss'}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def stats():
+    keys = [f"stats:{kind}:{result}" for kind in STAT_KINDS for result in ("hit", "miss")]
+    found = cache.get_many(keys)
+    return {key.split(":", 1)[1]: found.get(key, 0) for key in keys}
+
+
+def reset_stats():
+    cache.delete_many([f"stats:{kind}:{result}" for kind in STAT_KINDS for result in ("hit", "miss")])
+
+
+def cache_public_page(*depends, timeout=PAGE_TIMEOUT):
+    """Cache whole GET responses for anonymous users.
+
+    The key covers the full path and the generations listed in ``depends``.
+    Logged-in users always get a fresh render, and so do requests with flash
+    messages waiting, which must not be stored and shown to everyone. A miss
+    renders from the primary, so the new generation never gets replica rows.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or request.user.is_authenticated or _has_messages(request):
+                return view(request, *args, **kwargs)
+
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f"page:{view.__name__}:{version_token(*depends)}:{path}"
+            response = cache.get(key)
+            record("page", response is not None)
+            if response is not None:
+                return response
+
+            routing.pin_primary()
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                if hasattr(response, "render") and callable(response.render):
+                    response.render()
+                # The view may have added a message, or set a cookie while rendering.
+                if not response.cookies and not _has_messages(request):
+                    cache.set(key, response, timeout)
+            return response
+        return wrapped
+    return decorator
+
+
+def _has_messages(request):
+    # len() does not mark the messages as seen, so they are still shown.
+    return hasattr(request, "_messages") and len(get_messages(request)) > 0
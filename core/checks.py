@@ -0,0 +1,27 @@
+"""System checks for settings the app relies on in production."""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in one process only.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def shared_cache(app_configs, **kwargs):
+    """Cache generations (core.cache) tell other processes that skills, projects
+    or users changed, so outside DEBUG the default cache must be shared."""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f"The default cache ({backend.rsplit('.', 1)[-1]}) is not shared between processes.",
+        hint=(
+            "Other workers would keep serving stale skills and cached pages after a write. "
+            "Set DJANGO_CACHE_DIR or configure a shared backend such as Redis or Memcached; "
+            "silence core.E001 only if the site runs as a single process."
+        ),
+        id="core.E001",
+    )]
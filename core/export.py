@@ -0,0 +1,124 @@
+"""Streaming exports of projects, proposals, reviews and messages.
+
+Rows are read in keyset batches ordered by (timestamp, id), so every batch
+is one index range scan and memory stays flat however large the table is.
+``.iterator()`` alone would not do that on MySQL, where the client library
+buffers the whole result set. Skill names are attached per batch with one
+query and the in-process skill registry.
+
+``since`` keeps rows whose timestamp is at or after the given moment, so an
+incremental pull can pass the newest timestamp it has already seen.
+"""
+import csv
+from typing import NamedTuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .listings import skill_names
+from .models import Message, Project, ProjectSkill, Proposal, Review
+from .pagination import keyset_filter
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class Export(NamedTuple):
+    model: type
+    time_field: str
+    fields: tuple
+    related: dict
+    skills_of: str = None  # row key holding the project id whose skills to attach
+
+
+EXPORTS = {
+    "projects": Export(
+        Project, "created_at",
+        ("id", "title", "description", "budget", "status", "created_at", "client_id"),
+        {"client_username": F("client__username")},
+        skills_of="id",
+    ),
+    "proposals": Export(
+        Proposal, "submitted_at",
+        ("id", "project_id", "freelancer_id", "proposed_price", "status", "submitted_at", "message"),
+        {"project_title": F("project__title"), "freelancer_username": F("freelancer__username")},
+        skills_of="project_id",
+    ),
+    "reviews": Export(
+        Review, "created_at",
+        ("id", "proposal_id", "rating", "comment", "created_at"),
+        {
+            "project_id": F("proposal__project_id"),
+            "freelancer_id": F("proposal__freelancer_id"),
+            "client_id": F("proposal__project__client_id"),
+        },
+    ),
+    "messages": Export(
+        Message, "timestamp",
+        ("id", "sender_id", "receiver_id", "text", "attachment", "timestamp"),
+        {"sender_username": F("sender__username"), "receiver_username": F("receiver__username")},
+    ),
+}
+
+
+def columns(kind):
+    spec = EXPORTS[kind]
+    return [*spec.fields, *spec.related, *(["skills"] if spec.skills_of else [])]
+
+
+def rows(kind, since=None, chunk_size=CHUNK_SIZE):
+    """Yield export rows of ``kind`` as dicts, oldest first."""
+    spec = EXPORTS[kind]
+    order = (spec.time_field, "id")
+    qs = spec.model.objects.all()
+    if since is not None:
+        qs = qs.filter(**{f"{spec.time_field}__gte": since})
+    qs = qs.values(*spec.fields, **spec.related).order_by(*order)
+
+    last = None
+    while True:
+        page = qs if last is None else keyset_filter(qs, order, last, descending=False)
+        batch = list(page[:chunk_size])
+        if not batch:
+            return
+        if spec.skills_of:
+            names = skill_names(ProjectSkill, "project_id", list({r[spec.skills_of] for r in batch}))
+            for r in batch:
+                r["skills"] = names.get(r[spec.skills_of], [])
+        yield from batch
+        if len(batch) < chunk_size:
+            return
+        last = [batch[-1][f] for f in order]
+
+
+def ndjson_lines(records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for r in records:
+        yield encoder.encode(r) + "\n"
+
+
+class _Line:
+    """File-like target that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(kind, records):
+    writer = csv.writer(_Line())
+    header = columns(kind)
+    yield writer.writerow(header)
+    for r in records:
+        if "skills" in r:
+            r["skills"] = ";".join(r["skills"])
+        yield writer.writerow([r[c] for c in header])
+
+
+def stream(kind, fmt, since=None, chunk_size=CHUNK_SIZE):
+    records = rows(kind, since, chunk_size)
+    if fmt == "csv":
+        return csv_lines(kind, records)
+    return ndjson_lines(records)
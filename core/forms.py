@@ -1,19 +1,25 @@
 from django import forms
-from .models import Project, Proposal, SkillTag, Message
+from .models import Project, Proposal, Message
 from .models import Review
 from django import forms
-from .models import CustomUser
+from .models import CustomUser, UserSkill
+from .search import index_freelancer
+from .skills import skill_choices
+from . import thumbnails
+
+class SkillChoiceField(forms.TypedMultipleChoiceField):
+    """Multiple skills picked from the in-memory registry; cleans to a list of ids."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("widget", forms.CheckboxSelectMultiple)
+        super().__init__(choices=skill_choices, coerce=int, **kwargs)
+
 
 class ProjectForm(forms.ModelForm):
-    skills = forms.ModelMultipleChoiceField(
-        queryset=SkillTag.objects.none(),
-        widget=forms.CheckboxSelectMultiple,
-        required=True,
-    )
+    skills = SkillChoiceField(required=True)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields["skills"].queryset = SkillTag.objects.all()
         self.fields["title"].widget = forms.TextInput(attrs={
             "class": "mt-2 w-full rounded-lg border px-4 py-2 focus:outline-none focus:ring-2 focus:ring-brand-500"
         })
@@ -29,7 +35,7 @@ class ProjectForm(forms.ModelForm):
 
     class Meta:
         model = Project
-        fields = ["title", "description", "budget", "skills"]
+        fields = ["title", "description", "budget"]
 
 
 class ProposalForm(forms.ModelForm):
@@ -59,24 +65,38 @@ class ReviewForm(forms.ModelForm):
 
 
 class ProfileForm(forms.ModelForm):
-    skills = forms.ModelMultipleChoiceField(
-        queryset=SkillTag.objects.order_by("name"),
-        required=False,
-        widget=forms.CheckboxSelectMultiple,
-    )
+    skills = SkillChoiceField(required=False)
 
     class Meta:
         model = CustomUser
-        fields = ["name", "email", "location", "bio", "skills"]
+        fields = ["name", "email", "location", "bio", "profile_picture"]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         instance = kwargs.get("instance") or getattr(self, "instance", None)
         if instance and not getattr(instance, "is_freelancer", False):
             self.fields.pop("skills", None)
+        elif instance and instance.pk:
+            self.initial.setdefault(
+                "skills", list(UserSkill.objects.filter(user=instance).values_list("skill_id", flat=True))
+            )
 
     def save(self, commit=True):
+        stale = None
+        if "profile_picture" in self.changed_data:
+            # The old thumbnails go; the new ones are made in the background.
+            stale, self.instance.picture_variants = self.instance.picture_variants, {}
         user = super().save(commit=commit)
         if "skills" in self.cleaned_data and hasattr(user, "skills"):
             user.skills.set(self.cleaned_data["skills"])
-        return user
\ No newline at end of file
+        if commit:
+            index_freelancer(user)
+            if stale is not None:
+                thumbnails.schedule(user, stale)
+        return user
+
+class ProjectImportForm(forms.Form):
+    FORMAT_CHOICES = [("", "Detect from file name"), ("csv", "CSV"), ("ndjson", "NDJSON")]
+
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
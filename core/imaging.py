@@ -0,0 +1,45 @@
+"""Image resizing run in worker processes by core.thumbnails.
+
+Deliberately free of Django imports, so a freshly spawned worker can
+unpickle and run ``render`` without configuring settings or apps.
+"""
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def render(source, targets):
+    """Write square thumbnails of the image at ``source``.
+
+    ``targets`` maps ``(size, format)`` to an output path. Each file is
+    written to a temporary name first and moved into place, so readers never
+    see a partial image. Returns the ``(size, format)`` keys written.
+    """
+    with Image.open(source) as original:
+        original.draft("RGB", (max(size for size, _ in targets),) * 2)  # JPEG: decode at a reduced scale
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    written = []
+    for size in sorted({size for size, _ in targets}, reverse=True):
+        # Resize from the previous (larger) thumbnail rather than the original.
+        image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        for (target_size, fmt), path in targets.items():
+            if target_size != size:
+                continue
+            pil_format, options = FORMATS[fmt]
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    image.save(out, pil_format, **options)
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+            written.append((size, fmt))
+    return written
@@ -0,0 +1,198 @@
+"""Bulk import of a client's projects from CSV or NDJSON.
+
+Input is read as a stream, one record at a time. Each record needs
+``title``, ``description`` and ``budget``, and may carry ``status`` and
+``skills`` (a list, or names separated by ``;`` or ``,``). Invalid records
+are reported with their line number and skipped. Valid ones are written in
+batches, one transaction per batch: unknown skill names are created, then
+Project, ProjectSkill and search rows are bulk-inserted.
+"""
+import csv
+import json
+import re
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .models import Project, ProjectSearchDocument, ProjectSkill, SkillTag
+from .signals import bump_on_commit
+from .skills import registry as skill_registry
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+MAX_BUDGET = Decimal("99999999.99")  # Project.budget is DECIMAL(10, 2)
+STATUSES = {value for value, _ in Project.STATUS_CHOICES}
+TITLE_LENGTH = Project._meta.get_field("title").max_length
+SKILL_LENGTH = SkillTag._meta.get_field("name").max_length
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []  # (line number, message), capped at MAX_REPORTED_ERRORS
+        self.skills_created = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def detect_format(name):
+    return "ndjson" if name.lower().endswith((".ndjson", ".jsonl", ".json")) else "csv"
+
+
+def read_records(lines, fmt):
+    """Yield ``(line_number, dict or error string)`` from an iterable of text lines."""
+    if fmt == "ndjson":
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}"
+                continue
+            yield number, record if isinstance(record, dict) else "Expected a JSON object."
+        return
+    reader = csv.DictReader(lines)
+    for record in reader:
+        # line_num is where the record ends; header is line 1.
+        yield reader.line_num, record
+
+
+def clean(record):
+    """Validate one record; returns ``(fields, skill names)`` or raises ValueError."""
+    title = str(record.get("title") or "").strip()
+    if not title:
+        raise ValueError("title is required.")
+    if len(title) > TITLE_LENGTH:
+        raise ValueError(f"title is longer than {TITLE_LENGTH} characters.")
+    try:
+        budget = Decimal(str(record.get("budget", "")).strip()).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        raise ValueError("budget must be a number.")
+    if not 0 <= budget <= MAX_BUDGET:
+        raise ValueError(f"budget must be between 0 and {MAX_BUDGET}.")
+    status = str(record.get("status") or "new").strip().lower()
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(sorted(STATUSES))}.")
+
+    skills = record.get("skills") or []
+    if isinstance(skills, str):
+        skills = re.split(r"[;,]", skills)
+    names = {}
+    for name in skills:
+        name = str(name).strip()
+        if not name:
+            continue
+        if len(name) > SKILL_LENGTH:
+            raise ValueError(f"skill {name[:20]!r}… is longer than {SKILL_LENGTH} characters.")
+        names.setdefault(name.lower(), name)
+    fields = {
+        "title": title,
+        "description": str(record.get("description") or "").strip(),
+        "budget": budget,
+        "status": status,
+    }
+    return fields, list(names.values())
+
+
+def resolve_skills(names):
+    """``({lowercase name: id}, number created)`` for ``names``, creating the missing SkillTags."""
+    missing = {n.lower(): n for n in names if skill_registry.id_for(n) is None}
+    created = 0
+    for name in missing.values():
+        # One at a time: an insert that loses to a concurrent import must not
+        # count, and bulk_create(ignore_conflicts=True) does not say which did.
+        # New names are rare; the save signal reloads the registry.
+        _, new = SkillTag.objects.get_or_create(name=name)
+        created += new
+    return {n.lower(): skill_registry.id_for(n) for n in names}, created
+
+
+def _write_batch(client, batch, result):
+    stamp = timezone.now()
+    names = {n for _, (_, skills) in batch for n in skills}
+    with transaction.atomic():
+        skill_ids, created = resolve_skills(names)
+        projects = [Project(client=client, created_at=stamp, **fields) for _, (fields, _) in batch]
+        Project.objects.bulk_create(projects)
+        if projects and projects[0].pk is None:
+            # MySQL does not return ids from a multi-row INSERT. The batch
+            # shares one created_at, and one statement assigns ids in row order.
+            ids = list(
+                Project.objects.filter(client=client, created_at=stamp).order_by("id").values_list("id", flat=True)
+            )
+            if len(ids) != len(projects):
+                raise DatabaseError("Could not read back the ids of the inserted projects.")
+            for project, project_id in zip(projects, ids):
+                project.pk = project_id
+        links = [
+            ProjectSkill(project_id=project.pk, skill_id=skill_ids[n.lower()])
+            for project, (_, (_, skills)) in zip(projects, batch)
+            for n in skills
+        ]
+        ProjectSkill.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        names = skill_registry.names_for({
+            project.pk: [skill_ids[n.lower()] for n in skills] for project, (_, (_, skills)) in zip(projects, batch)
+        })
+        ProjectSearchDocument.objects.bulk_create([
+            ProjectSearchDocument(
+                project_id=project.pk,
+                title=project.title,
+                description=project.description,
+                skills_text=" ".join(names[project.pk]),
+            )
+            for project in projects
+        ])
+        bump_on_commit("projects")
+    result.created += len(projects)
+    result.skills_created += created
+
+
+def import_projects(client, lines, fmt="csv", batch_size=BATCH_SIZE, progress=None):
+    """Import projects for ``client`` from text ``lines``; returns an ImportResult.
+
+    ``progress``, if given, is called with the result after every batch.
+    """
+    result = ImportResult()
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        try:
+            _write_batch(client, batch, result)
+        except DatabaseError as e:
+            # Skills created by the rolled-back batch may be in the registry.
+            skill_registry.invalidate()
+            for line, _ in batch:
+                result.error(line, f"Batch failed: {e}")
+        batch.clear()
+        result.elapsed = time.perf_counter() - started
+        if progress:
+            progress(result)
+
+    for line, record in read_records(lines, fmt):
+        if isinstance(record, str):
+            result.error(line, record)
+            continue
+        try:
+            batch.append((line, clean(record)))
+        except ValueError as e:
+            result.error(line, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    result.elapsed = time.perf_counter() - started
+    return result
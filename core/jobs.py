@@ -0,0 +1,144 @@
+"""Durable background jobs stored in the ``jobs`` table.
+
+``enqueue`` writes the job row in the caller's transaction, so a job becomes
+visible to workers exactly when the request's own writes commit and vanishes
+with them on rollback. ``manage.py run_jobs`` claims due rows with a
+conditional UPDATE (no row stays locked while a handler runs), then runs the
+handler and marks the job done in one transaction, provided the worker still
+holds its lease. A failing job is retried with exponential backoff until
+``max_attempts`` is reached.
+
+Handlers are registered by kind::
+
+    @jobs.handler("message.send")
+    def send(payload): ...
+
+A handler with slow work that needs no database (rendering, remote calls) is
+registered with ``staged=True``: it runs outside any transaction, so it holds
+no locks while it works, and returns a function (or None) that makes its
+writes; ``run`` calls that inside the transaction that marks the job done.
+"""
+import logging
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+BACKOFF_BASE = 30  # seconds before the first retry; doubles on each attempt
+BACKOFF_MAX = 3600
+# A running job whose worker has not finished it within this window is
+# assumed lost (crashed process) and handed out again.
+LEASE = timedelta(minutes=10)
+
+
+class LeaseLost(Exception):
+    """The job was handed to another worker while this one ran it."""
+
+
+def handler(kind, staged=False):
+    def register(func):
+        func.staged = staged
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, key=None, delay=None, max_attempts=5):
+    """Add a job; a second enqueue with the same ``key`` is a no-op."""
+    job = Job(kind=kind, payload=payload or {}, idempotency_key=key, max_attempts=max_attempts)
+    if delay:
+        job.run_after = timezone.now() + delay
+    # ignore_conflicts keeps a duplicate key from aborting the caller's transaction.
+    Job.objects.bulk_create([job], ignore_conflicts=True)
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX))
+
+
+def requeue_stale(now=None):
+    now = now or timezone.now()
+    return Job.objects.filter(status="running", locked_at__lt=now - LEASE).update(
+        status="pending", locked_at=None
+    )
+
+
+def claim(limit=10, kinds=None):
+    """Mark up to ``limit`` due jobs as running and return them."""
+    now = timezone.now()
+    due = Job.objects.filter(status="pending", run_after__lte=now)
+    if kinds:
+        due = due.filter(kind__in=kinds)
+    claimed = []
+    for job_id in due.order_by("run_after", "id").values_list("id", flat=True)[:limit]:
+        # Only one worker can flip a given row from pending to running.
+        won = Job.objects.filter(pk=job_id, status="pending").update(
+            status="running", locked_at=now, attempts=F("attempts") + 1
+        )
+        if won:
+            claimed.append(job_id)
+    return list(Job.objects.filter(pk__in=claimed).order_by("run_after", "id"))
+
+
+def run(job):
+    """Run a claimed job; returns its final status for this attempt.
+
+    Every outcome is written only while this worker still holds the lease
+    (the row is "running" with the ``locked_at`` it claimed). If the job
+    outlived LEASE and was requeued, the handler's writes are rolled back
+    and the outcome is left to whichever worker claimed it next: "lost".
+    """
+    func = HANDLERS.get(job.kind)
+    leased = Job.objects.filter(pk=job.pk, status="running", locked_at=job.locked_at)
+    try:
+        if func is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}.")
+        if getattr(func, "staged", False):
+            write = func(job.payload) or (lambda: None)
+        else:
+            write = partial(func, job.payload)
+        with transaction.atomic():
+            write()
+            # Completing inside the handler's transaction means its writes and
+            # the "done" mark commit together, so a crash cannot repeat them.
+            if not leased.update(status="done", finished_at=timezone.now(), locked_at=None, last_error=""):
+                raise LeaseLost()
+        return "done"
+    except LeaseLost:
+        logger.warning("Job %s (%s) lost its lease while running", job.pk, job.kind)
+        return "lost"
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.pk, job.kind, job.attempts, exc_info=True)
+        if job.attempts >= job.max_attempts or func is None:
+            updated = leased.update(status="failed", finished_at=timezone.now(), locked_at=None, last_error=error)
+            return "failed" if updated else "lost"
+        updated = leased.update(
+            status="pending", run_after=timezone.now() + backoff(job.attempts), locked_at=None, last_error=error
+        )
+        return "retry" if updated else "lost"
+
+
+def run_pending(limit=100, kinds=None):
+    """Claim and run due jobs in this thread; returns ``{status: count}``."""
+    results = {}
+    for job in claim(limit, kinds):
+        status = run(job)
+        results[status] = results.get(status, 0) + 1
+    return results
+
+
+def prune(older_than):
+    """Delete finished jobs older than ``older_than`` (a timedelta)."""
+    cutoff = timezone.now() - older_than
+    deleted, _ = Job.objects.filter(status="done", finished_at__lt=cutoff).delete()
+    return deleted
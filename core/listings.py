@@ -0,0 +1,79 @@
+"""Lightweight row loaders for listing pages.
+
+Each loader turns an already filtered and paged ``.values()`` result into
+plain named tuples and attaches skill names with a single extra query, so a
+listing costs the same number of queries whatever its page size.
+"""
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.db.models import F
+
+from .models import ProjectSkill, UserSkill
+from .skills import registry as skill_registry
+
+
+class ProjectRow(NamedTuple):
+    id: int
+    title: str
+    description: str
+    budget: object
+    status: str
+    created_at: object
+    client_id: int
+    skills: list
+
+
+class FreelancerRow(NamedTuple):
+    user_id: int
+    username: str
+    location: str
+    avg_rating: float
+    review_count: int
+    name: str
+    bio: str
+    profile_picture: str
+    picture_variants: dict
+    skills: list
+
+
+PROJECT_FIELDS = ProjectRow._fields[:-1]
+FREELANCER_FIELDS = ("user_id", "username", "location", "avg_rating", "review_count")
+
+
+def skill_names(through, owner_field, owner_ids):
+    """``{owner_id: [skill name, ...]}`` for a ProjectSkill/UserSkill join table.
+
+    Only ids are read from the database; names come from the skill registry.
+    """
+    skill_ids = defaultdict(list)
+    if owner_ids:
+        pairs = through.objects.filter(**{f"{owner_field}__in": owner_ids}).values_list(owner_field, "skill_id")
+        for owner_id, skill_id in pairs:
+            skill_ids[owner_id].append(skill_id)
+    return skill_registry.names_for(skill_ids)
+
+
+def load_projects(records):
+    """Build ProjectRows from dicts produced by ``.values(*PROJECT_FIELDS)``."""
+    records = list(records)
+    skills = skill_names(ProjectSkill, "project_id", [r["id"] for r in records])
+    return [ProjectRow(skills=skills.get(r["id"], []), **r) for r in records]
+
+
+def freelancer_values(stats):
+    """``.values()`` for a FreelancerStats queryset, with profile text and picture from ``users``."""
+    return stats.values(
+        *FREELANCER_FIELDS,
+        name=F("user__name"),
+        bio=F("user__bio"),
+        profile_picture=F("user__profile_picture"),
+        picture_variants=F("user__picture_variants"),
+    )
+
+
+def load_freelancers(records):
+    """Build FreelancerRows from dicts produced by ``freelancer_values``."""
+    records = list(records)
+    skills = skill_names(UserSkill, "user_id", [r["user_id"] for r in records])
+    return [FreelancerRow(skills=skills.get(r["user_id"], []), **r) for r in records]
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import CONVERSATION_KEY_SHIFT, Conversation, Message
+
+
+class Command(BaseCommand):
+    help = "Rebuild the conversations summary table from existing messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Walking msg_conv_ts_idx yields each conversation's messages together
+        # and in time order, so only one batch of summaries is held in memory.
+        rows = (
+            Message.objects.filter(conversation_key__isnull=False)
+            .order_by("conversation_key", "timestamp", "id")
+            .only("conversation_key", "sender_id", "text", "attachment", "timestamp")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+        batch = []
+        total = 0
+        current = current_key = None
+        for m in rows:
+            if m.conversation_key != current_key:
+                # Every summary already in the batch is complete at this point.
+                if len(batch) >= options["batch_size"]:
+                    total += self._flush(batch)
+                    batch = []
+                current_key = m.conversation_key
+                current = Conversation(
+                    user_low_id=current_key // CONVERSATION_KEY_SHIFT,
+                    user_high_id=current_key % CONVERSATION_KEY_SHIFT,
+                )
+                batch.append(current)
+            current.message_count += 1
+            current.last_message_at = m.timestamp
+            current.last_message_preview = m.preview()
+            current.last_sender_id = m.sender_id
+        if batch:
+            total += self._flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {total} conversations."))
+
+    def _flush(self, batch):
+        with transaction.atomic():
+            Conversation.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["user_low", "user_high"],
+                update_fields=["last_message_at", "last_message_preview", "last_sender", "message_count"],
+            )
+        return len(batch)
@@ -0,0 +1,96 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmarks
+from core.models import CustomUser, Message, Project, Proposal, Review, SkillTag
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+class Command(BaseCommand):
+    help = "Time every route against the current database and write a JSON report (see seed_data)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--only", action="append", help="Scenario name or route to run (repeatable).")
+        parser.add_argument("--no-cache", action="store_true", help="Run with a dummy cache backend.")
+        parser.add_argument("--output", default="benchmark.json", help="Report path ('-' for stdout only).")
+        parser.add_argument("--compare", help="Earlier report to print p50/query deltas against.")
+
+    def handle(self, *args, **options):
+        try:
+            fx = benchmarks.fixture()
+        except LookupError as e:
+            raise CommandError(str(e))
+        selected = benchmarks.scenarios(fx)
+        missing = benchmarks.uncovered(selected)
+        if missing:
+            self.stderr.write(f"No scenario (not enough data?) for: {', '.join(missing)}")
+        if options["only"]:
+            wanted = set(options["only"])
+            selected = [s for s in selected if s.name in wanted or s.route in wanted]
+            if not selected:
+                raise CommandError("No scenario matches --only.")
+
+        results = {}
+        clients = {}
+        # The test client sends Host: testserver, as it does under manage.py test.
+        overrides = {"ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"]}
+        if options["no_cache"]:
+            overrides["CACHES"] = NO_CACHE
+        with override_settings(**overrides):
+            for scenario in selected:
+                results[scenario.name] = benchmarks.run(scenario, fx, clients, options["iterations"], options["warmup"])
+                self._print_row(scenario.name, results[scenario.name])
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "cache": "disabled" if options["no_cache"] else "configured",
+            },
+            "dataset": {
+                model._meta.db_table: model.objects.count()
+                for model in (CustomUser, SkillTag, Project, Proposal, Review, Message)
+            },
+            "scenarios": results,
+        }
+        if options["output"] != "-":
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if options["compare"]:
+            self._compare(options["compare"], results)
+
+    def _print_row(self, name, r):
+        lat = r["latency_ms"]
+        self.stdout.write(
+            f"{name:32} {lat['p50']:9.2f} {lat['p95']:9.2f} {lat['p99']:9.2f} ms"
+            f"  {r['queries']['median']:>5} q  {r['sql_ms_median']:8.2f} ms sql  {r['status']}"
+        )
+
+    def _compare(self, path, results):
+        with open(path) as f:
+            before = json.load(f)["scenarios"]
+        self.stdout.write(f"\nChange against {path} (p50 latency, median queries):")
+        for name, r in results.items():
+            old = before.get(name)
+            if old is None:
+                continue
+            p50, old_p50 = r["latency_ms"]["p50"], old["latency_ms"]["p50"]
+            pct = (p50 - old_p50) / old_p50 * 100 if old_p50 else 0.0
+            dq = r["queries"]["median"] - old["queries"]["median"]
+            self.stdout.write(f"{name:32} {old_p50:9.2f} → {p50:9.2f} ms ({pct:+6.1f}%)  queries {dq:+}")
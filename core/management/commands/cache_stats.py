@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core import cache
+
+
+class Command(BaseCommand):
+    help = "Show page and fragment cache hit/miss counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zero the counters after printing.")
+
+    def handle(self, *args, **options):
+        counters = cache.stats()
+        for kind in cache.STAT_KINDS:
+            hits = counters[f"{kind}:hit"]
+            misses = counters[f"{kind}:miss"]
+            total = hits + misses
+            ratio = f"{100 * hits / total:.1f}%" if total else "-"
+            self.stdout.write(f"{kind:<10} hits={hits} misses={misses} hit_ratio={ratio}")
+        if options["reset"]:
+            cache.reset_stats()
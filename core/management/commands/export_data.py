@@ -0,0 +1,46 @@
+import sys
+import time
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import export
+
+
+class Command(BaseCommand):
+    help = "Stream projects, proposals, reviews or messages as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(export.EXPORTS))
+        parser.add_argument("--format", choices=sorted(export.FORMATS), default="ndjson")
+        parser.add_argument("--since", help="Only rows at or after this ISO 8601 timestamp (UTC if no offset).")
+        parser.add_argument("--output", default="-", help="File to write ('-' for stdout).")
+        parser.add_argument("--chunk-size", type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = parse_datetime(options["since"])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError(f"Invalid --since timestamp: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, dt_timezone.utc)
+
+        lines = export.stream(options["kind"], options["format"], since, options["chunk_size"])
+        started = time.perf_counter()
+        count = -1 if options["format"] == "csv" else 0  # don't count the CSV header
+        out = sys.stdout if options["output"] == "-" else open(options["output"], "w", newline="", encoding="utf-8")
+        try:
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f"Exported {max(count, 0)} {options['kind']} in {elapsed:.1f}s.")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core import blobs
+
+
+class Command(BaseCommand):
+    help = "Delete attachment files no message has referenced for a grace period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=blobs.GRACE / 3600,
+                            help="Keep unreferenced files at least this long.")
+        parser.add_argument("--batch-size", type=int, default=blobs.BATCH_SIZE)
+        parser.add_argument("--orphans", action="store_true",
+                            help="Also walk the shard directories for files with no blob row.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted.")
+
+    def handle(self, *args, **options):
+        grace = int(options["grace_hours"] * 3600)
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        count, size = blobs.collect(grace=grace, batch_size=options["batch_size"], dry_run=options["dry_run"])
+        self.stdout.write(f"{verb} {count} unreferenced blobs ({size / 1e6:.1f} MB).")
+        if options["orphans"]:
+            count, size = blobs.collect_orphans(grace=grace, dry_run=options["dry_run"])
+            self.stdout.write(f"{verb} {count} orphaned files ({size / 1e6:.1f} MB).")
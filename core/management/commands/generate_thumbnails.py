@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import thumbnails
+from core.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Generate missing profile picture thumbnails for existing users, in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Pictures in flight at once.")
+        parser.add_argument("--workers", type=int, help="Processes resizing images (default: one per CPU).")
+        parser.add_argument("--force", action="store_true", help="Regenerate thumbnails that already exist.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        thumbnails.pool(options["workers"])
+        storage = CustomUser._meta.get_field("profile_picture").storage
+        users = (
+            CustomUser.objects.exclude(profile_picture="").exclude(profile_picture__isnull=True)
+            .order_by("user_id")
+            .values_list("user_id", "profile_picture", "picture_variants")
+            .iterator(chunk_size=options["batch_size"])
+        )
+        started = time.perf_counter()
+        done = failed = 0
+        batch = []
+
+        def flush():
+            nonlocal done, failed
+            for user_id, name, future in batch:
+                try:
+                    variants = thumbnails.variants_of(name, future.result())
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"user {user_id} ({name}): {e}")
+                    continue
+                thumbnails.save_variants(user_id, name, variants)
+                done += 1
+            batch.clear()
+            rate = done / (time.perf_counter() - started)
+            self.stdout.write(f"  {done} done, {failed} failed ({rate:.1f}/s)")
+
+        for user_id, name, variants in users:
+            if variants and not options["force"]:
+                continue
+            batch.append((user_id, name, thumbnails.submit(storage, name)))
+            if len(batch) >= options["batch_size"]:
+                flush()
+        if batch:
+            flush()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated thumbnails for {done} pictures, {failed} failed, in {elapsed:.1f}s "
+            f"({done / elapsed if elapsed else 0:.1f}/s)."
+        ))
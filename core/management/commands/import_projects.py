@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importer
+from core.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Import a client's projects from CSV or NDJSON, in batches, reporting rows that fail."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read ('-' for stdin).")
+        parser.add_argument("--client", required=True, help="Username of the client who will own the projects.")
+        parser.add_argument("--format", choices=("csv", "ndjson"), help="Default: from the file extension.")
+        parser.add_argument("--batch-size", type=int, default=importer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            client = CustomUser.objects.get(username=options["client"], is_client=True)
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No client named {options['client']!r}.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        path = options["path"]
+        fmt = options["format"] or importer.detect_format(path)
+
+        def progress(result):
+            self.stdout.write(f"  {result.created} imported, {result.failed} failed ({result.rate:.0f}/s)")
+
+        source = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        try:
+            result = importer.import_projects(client, source, fmt, options["batch_size"], progress)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"… {result.failed - len(result.errors)} more errors not shown.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} projects ({result.skills_created} new skills), "
+            f"{result.failed} failed, in {result.elapsed:.1f}s ({result.rate:.0f}/s)."
+        ))
@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core import cache
+from core.listings import PROJECT_FIELDS, load_projects, skill_names
+from core.models import CustomUser, FreelancerStats, Project, ProjectSearchDocument, Review, UserSkill
+
+
+class Command(BaseCommand):
+    help = "Rebuild project search documents and freelancer stats rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--only", choices=["projects", "freelancers"])
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if options["only"] != "freelancers":
+            total = self.rebuild_projects(batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Indexed {total} projects."))
+        if options["only"] != "projects":
+            total = self.rebuild_freelancers(batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Indexed {total} freelancers."))
+        # bulk_create sends no signals; drop pages rendered from the old rows.
+        cache.bump("projects", "users")
+
+    def rebuild_projects(self, batch_size):
+        last_id = 0
+        total = 0
+        while True:
+            rows = load_projects(
+                Project.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values(*PROJECT_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            with transaction.atomic():
+                ProjectSearchDocument.objects.bulk_create(
+                    [
+                        ProjectSearchDocument(
+                            project_id=r.id,
+                            title=r.title,
+                            description=r.description,
+                            skills_text=" ".join(r.skills),
+                        )
+                        for r in rows
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["project"],
+                    update_fields=["title", "description", "skills_text"],
+                )
+            last_id = rows[-1].id
+            total += len(rows)
+        return total
+
+    def rebuild_freelancers(self, batch_size):
+        last_id = 0
+        total = 0
+        while True:
+            users = list(
+                CustomUser.objects.filter(is_freelancer=True, pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", "username", "location")[:batch_size]
+            )
+            if not users:
+                break
+            ids = [u[0] for u in users]
+
+            skills = skill_names(UserSkill, "user_id", ids)
+
+            histograms = defaultdict(lambda: [0] * 6)
+            for user_id, rating, count in (
+                Review.objects.filter(proposal__freelancer_id__in=ids)
+                .values_list("proposal__freelancer_id", "rating")
+                .annotate(count=Count("id"))
+                .order_by()
+            ):
+                histograms[user_id][rating] = count
+
+            rows = []
+            for user_id, username, location in users:
+                stars = histograms[user_id]
+                review_count = sum(stars)
+                rating_total = sum(rating * n for rating, n in enumerate(stars))
+                rows.append(FreelancerStats(
+                    user_id=user_id,
+                    username=username,
+                    location=location,
+                    skills_text=" ".join(n.lower() for n in skills.get(user_id, [])),
+                    review_count=review_count,
+                    rating_total=rating_total,
+                    avg_rating=rating_total / review_count if review_count else 0,
+                    **{f"stars_{i}": stars[i] for i in range(1, 6)},
+                ))
+            with transaction.atomic():
+                FreelancerStats.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["user"],
+                    update_fields=[
+                        "username", "location", "skills_text",
+                        "review_count", "rating_total", "avg_rating",
+                        "stars_1", "stars_2", "stars_3", "stars_4", "stars_5", "updated_at",
+                    ],
+                )
+            last_id = ids[-1]
+            total += len(rows)
+        return total
@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import jobs
+
+
+def _run(job):
+    try:
+        return jobs.run(job)
+    finally:
+        # Pool threads are reused; close their connections between jobs
+        # so a dropped or stale connection is not carried into the next one.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (notification messages and other side effects)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Threads running jobs concurrently.")
+        parser.add_argument("--batch-size", type=int, default=20, help="Jobs claimed per poll.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument("--kind", action="append", dest="kinds", help="Only run jobs of this kind (repeatable).")
+        parser.add_argument("--once", action="store_true", help="Exit once no job is due instead of polling.")
+        parser.add_argument("--prune-days", type=int, default=7,
+                            help="Delete finished jobs older than this many days (0 to keep them).")
+
+    def handle(self, *args, **options):
+        totals = {}
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            try:
+                while True:
+                    close_old_connections()
+                    jobs.requeue_stale()
+                    batch = jobs.claim(options["batch_size"], options["kinds"])
+                    for status in pool.map(_run, batch):
+                        totals[status] = totals.get(status, 0) + 1
+                    if not batch:
+                        if options["once"]:
+                            break
+                        time.sleep(options["poll_interval"])
+            except KeyboardInterrupt:
+                pass
+
+        if options["prune_days"]:
+            jobs.prune(timedelta(days=options["prune_days"]))
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(totals.items())) or "no jobs"
+        self.stdout.write(self.style.SUCCESS(f"Ran {summary}."))
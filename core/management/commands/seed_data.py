@@ -0,0 +1,304 @@
+import io
+import itertools
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from core import cache
+from core.storage import digest_of
+from core.models import (
+    Blob,
+    CustomUser,
+    Message,
+    Project,
+    ProjectSkill,
+    Proposal,
+    Review,
+    SkillTag,
+    UserSkill,
+    conversation_key,
+)
+
+WORDS = (
+    "api backend frontend mobile app website redesign migration dashboard data pipeline "
+    "integration payment checkout search analytics report automation bot scraper cms "
+    "ecommerce store landing page audit performance security testing deployment cloud "
+    "infrastructure chat realtime booking marketplace inventory crm erp portal"
+).split()
+SKILL_STEMS = (
+    "Python Django Flask FastAPI JavaScript TypeScript React Vue Angular Svelte Node Go Rust "
+    "Java Kotlin Swift PHP Laravel Ruby Rails SQL MySQL PostgreSQL Redis Docker Kubernetes AWS "
+    "GCP Azure Terraform Figma Photoshop Illustrator Copywriting SEO Excel Tableau PowerBI"
+).split()
+LOCATIONS = ("Berlin", "Lagos", "Manila", "São Paulo", "Toronto", "Kyiv", "Pune", "Austin", "Remote", "")
+
+
+def zipf_weights(n, exponent=1.1):
+    """Cumulative weights where rank r is drawn with probability ∝ 1 / r**exponent."""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+class Command(BaseCommand):
+    help = "Seed a reproducible, production-shaped dataset (skewed activity, long chats, popular skills)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--client-ratio", type=float, default=0.25)
+        parser.add_argument("--skills", type=int, default=150)
+        parser.add_argument("--projects", type=int, default=3000)
+        parser.add_argument("--proposals", type=int, default=15000)
+        parser.add_argument("--messages", type=int, default=30000)
+        parser.add_argument("--attachments", type=int, help="Messages carrying a file (default: 1 in 50).")
+        parser.add_argument("--avatar-ratio", type=float, default=0.3, help="Share of users with a profile picture.")
+        parser.add_argument("--days", type=int, default=365, help="Spread timestamps over this many past days.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--password", default="seed-password", help="Password set on every seeded user.")
+        parser.add_argument("--prefix", default="seed", help="Username prefix; must not be in use yet.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if CustomUser.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users named '{prefix}-*' already exist; use another --prefix or a fresh database.")
+        if options["users"] < 2 or not 0 < options["client_ratio"] < 1:
+            raise CommandError("Need at least two users and a client ratio between 0 and 1.")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now().replace(microsecond=0)
+        self.span = timedelta(days=options["days"]).total_seconds()
+        started = time.perf_counter()
+
+        skills = self.seed_skills(options["skills"])
+        clients, freelancers = self.seed_users(options, prefix)
+        self.seed_user_skills(freelancers, skills)
+        projects = self.seed_projects(options["projects"], clients, skills)
+        pairs = self.seed_proposals(options["proposals"], projects, freelancers)
+        attachments = options["attachments"]
+        if attachments is None:
+            attachments = options["messages"] // 50
+        self.seed_messages(options["messages"], pairs, attachments)
+
+        self.stdout.write("Building conversations and search documents…")
+        call_command("backfill_conversations", stdout=self.stdout)
+        call_command("rebuild_search_index", stdout=self.stdout)
+        cache.bump("skills", "reviews")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Seeded dataset (seed={options['seed']}) in {elapsed:.1f}s."))
+
+    # -- helpers -----------------------------------------------------------
+
+    def past(self, max_age=None):
+        """A timestamp up to ``max_age`` seconds ago, skewed towards recent."""
+        age = (max_age or self.span) * self.rng.random() ** 2
+        return self.now - timedelta(seconds=int(age))
+
+    def next_ids(self, model, count):
+        start = (model.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+        return range(start, start + count)
+
+    def insert(self, model, objs, label):
+        for i in range(0, len(objs), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(objs[i:i + self.batch_size])
+        self.stdout.write(f"  {label}: {len(objs)}")
+
+    def avatar(self, username):
+        """Save a generated photo-sized picture; returns its storage name."""
+        from PIL import Image
+
+        size = self.rng.choice((400, 800, 1200))
+        tint = tuple(self.rng.randrange(256) for _ in range(3))
+        shade = Image.linear_gradient("L").resize((size, size))
+        picture = Image.merge("RGB", [shade.point(lambda v, c=c: (v + c) // 2) for c in tint])
+        buf = io.BytesIO()
+        picture.save(buf, "JPEG", quality=85)
+        field = CustomUser._meta.get_field("profile_picture")
+        return field.storage.save(f"profile_pics/{username}.jpg", ContentFile(buf.getvalue()))
+
+    def documents(self, count):
+        """``count`` distinct attachment files as (stored name, original name)."""
+        storage = Message._meta.get_field("attachment").storage
+        docs = []
+        for i in range(count):
+            body = f"%PDF-1.4 seed contract {i}\n".encode() * self.rng.randint(10, 5000)
+            docs.append((storage.save("attachments/seed.pdf", ContentFile(body)), f"contract-{i}.pdf"))
+        return docs
+
+    # -- entities ----------------------------------------------------------
+
+    def seed_skills(self, count):
+        existing = set(SkillTag.objects.values_list("name", flat=True))
+        names = []
+        for variant in itertools.count():
+            for stem in SKILL_STEMS:
+                name = stem if variant == 0 else f"{stem} {variant + 1}"
+                if name not in existing:
+                    names.append(name)
+                if len(names) == count:
+                    break
+            if len(names) == count:
+                break
+        ids = self.next_ids(SkillTag, count)
+        self.insert(SkillTag, [SkillTag(id=i, name=n) for i, n in zip(ids, names)], "skills")
+        return list(ids)
+
+    def seed_users(self, options, prefix):
+        count = options["users"]
+        n_clients = max(1, int(count * options["client_ratio"]))
+        password = make_password(options["password"])
+        ids = self.next_ids(CustomUser, count)
+        users = []
+        for n, user_id in enumerate(ids):
+            is_client = n < n_clients
+            username = f"{prefix}-{'client' if is_client else 'dev'}-{n}"
+            picture = self.avatar(username) if self.rng.random() < options["avatar_ratio"] else None
+            users.append(CustomUser(
+                user_id=user_id,
+                username=username,
+                name=f"{prefix.title()} User {n}",
+                password=password,
+                is_client=is_client,
+                is_freelancer=not is_client,
+                bio=" ".join(self.rng.choices(WORDS, k=self.rng.randint(0, 30))),
+                location=self.rng.choice(LOCATIONS),
+                profile_picture=picture,
+            ))
+        self.insert(CustomUser, users, "users")
+        return list(ids[:n_clients]), list(ids[n_clients:])
+
+    def seed_user_skills(self, freelancers, skills):
+        weights = zipf_weights(len(skills))
+        rows = []
+        for user_id in freelancers:
+            picked = set(self.rng.choices(skills, cum_weights=weights, k=self.rng.randint(1, 12)))
+            rows.extend(UserSkill(user_id=user_id, skill_id=s) for s in picked)
+        self.insert(UserSkill, rows, "user skills")
+
+    def seed_projects(self, count, clients, skills):
+        owners = self.rng.choices(clients, cum_weights=zipf_weights(len(clients)), k=count)
+        skill_weights = zipf_weights(len(skills))
+        ids = self.next_ids(Project, count)
+        projects, links = [], []
+        for project_id, client_id in zip(ids, owners):
+            created = self.past()
+            age = (self.now - created).total_seconds() / self.span
+            # Older projects are more likely to have moved on from "new".
+            roll = self.rng.random()
+            status = "completed" if roll < age * 0.5 else "ongoing" if roll < age * 0.8 else "new"
+            projects.append(Project(
+                id=project_id,
+                client_id=client_id,
+                title=" ".join(self.rng.choices(WORDS, k=self.rng.randint(2, 6))).capitalize(),
+                description=" ".join(self.rng.choices(WORDS, k=self.rng.randint(20, 200))),
+                budget=Decimal(int(self.rng.lognormvariate(6.5, 1.0))) + 10,
+                created_at=created,
+                status=status,
+            ))
+            picked = set(self.rng.choices(skills, cum_weights=skill_weights, k=self.rng.randint(1, 6)))
+            links.extend(ProjectSkill(project_id=project_id, skill_id=s) for s in picked)
+        self.insert(Project, projects, "projects")
+        self.insert(ProjectSkill, links, "project skills")
+        return projects
+
+    def seed_proposals(self, count, projects, freelancers):
+        """Spread ``count`` proposals over projects; returns (client, freelancer) pairs that talk."""
+        targets = self.rng.choices(projects, cum_weights=zipf_weights(len(projects), 0.8), k=count)
+        freelancer_weights = zipf_weights(len(freelancers))
+        by_project = {}
+        for project in targets:
+            by_project.setdefault(project.id, (project, set()))[1].add(
+                self.rng.choices(freelancers, cum_weights=freelancer_weights)[0]
+            )
+
+        ids = iter(self.next_ids(Proposal, count))
+        proposals, reviews, pairs = [], [], []
+        for project, applicants in by_project.values():
+            winner = self.rng.choice(sorted(applicants)) if project.status != "new" else None
+            for freelancer_id in sorted(applicants):
+                status = "pending" if winner is None else "accepted" if freelancer_id == winner else "rejected"
+                submitted = project.created_at + timedelta(
+                    seconds=int(self.rng.random() * min(7 * 86400, (self.now - project.created_at).total_seconds()))
+                )
+                proposal = Proposal(
+                    id=next(ids),
+                    project_id=project.id,
+                    freelancer_id=freelancer_id,
+                    message=" ".join(self.rng.choices(WORDS, k=self.rng.randint(10, 80))),
+                    proposed_price=project.budget * Decimal(self.rng.choice(("0.8", "0.9", "1.0", "1.1"))),
+                    submitted_at=submitted,
+                    status=status,
+                )
+                proposals.append(proposal)
+                if status == "accepted":
+                    pairs.append((project.client_id, freelancer_id, submitted))
+                    if project.status == "completed":
+                        reviews.append(Review(
+                            proposal_id=proposal.id,
+                            # Ratings cluster at the top, as they do in production.
+                            rating=self.rng.choices((1, 2, 3, 4, 5), weights=(3, 4, 10, 30, 53))[0],
+                            comment=" ".join(self.rng.choices(WORDS, k=self.rng.randint(0, 25))),
+                            created_at=submitted + timedelta(days=self.rng.randint(1, 60)),
+                        ))
+                elif self.rng.random() < 0.3:
+                    pairs.append((project.client_id, freelancer_id, submitted))
+        self.insert(Proposal, proposals, "proposals")
+        self.insert(Review, reviews, "reviews")
+        return pairs
+
+    def seed_messages(self, count, pairs, attachments=0):
+        if not pairs or not count:
+            self.stdout.write("  messages: 0")
+            return
+        # A few pairs carry very long threads; most exchange a handful of lines.
+        chosen = self.rng.choices(pairs, cum_weights=zipf_weights(len(pairs), 1.2), k=count)
+        per_pair = {}
+        for pair in chosen:
+            per_pair[pair] = per_pair.get(pair, 0) + 1
+
+        messages = []
+        for (client_id, freelancer_id, started), n in per_pair.items():
+            key = conversation_key(client_id, freelancer_id)
+            window = max(60.0, (self.now - started).total_seconds())
+            offsets = sorted(self.rng.random() * window for _ in range(n))
+            for offset in offsets:
+                sender, receiver = (client_id, freelancer_id) if self.rng.random() < 0.5 else (freelancer_id, client_id)
+                messages.append(Message(
+                    sender_id=sender,
+                    receiver_id=receiver,
+                    text=" ".join(self.rng.choices(WORDS, k=self.rng.randint(1, 40))),
+                    timestamp=started + timedelta(seconds=offset),
+                    # bulk_create skips Message.save(), so fill the key here.
+                    conversation_key=key,
+                ))
+        self.attach(messages, min(attachments, len(messages)))
+        self.insert(Message, messages, "messages")
+
+    def attach(self, messages, count):
+        """Give ``count`` messages files from a small pool, as repeated contracts are in production."""
+        if not count:
+            return
+        docs = self.documents(max(1, count // 5))
+        weights = zipf_weights(len(docs))
+        refs = {}
+        for message in self.rng.sample(messages, count):
+            name, original = self.rng.choices(docs, cum_weights=weights)[0]
+            message.attachment, message.attachment_name = name, original
+            refs[name] = refs.get(name, 0) + 1
+        # bulk_create skips the signals that count references.
+        storage = Message._meta.get_field("attachment").storage
+        for name, n in refs.items():
+            digest = digest_of(name)
+            if not Blob.objects.filter(digest=digest).update(refcount=F("refcount") + n, released_at=None):
+                Blob.objects.create(digest=digest, size=storage.size(name), refcount=n)
+        self.stdout.write(f"  attachments: {count} ({len(refs)} distinct files)")
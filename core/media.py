@@ -0,0 +1,129 @@
+"""Serving stored files: conditional GET, byte ranges and front-end hand-off.
+
+Whole files go out as a FileResponse, which WSGI servers with
+``wsgi.file_wrapper`` (gunicorn, uWSGI) send with sendfile(2). Single byte
+ranges are answered with 206 and read in chunks; multiple ranges in one
+request are answered with the whole file, which HTTP allows.
+
+When ``settings.MEDIA_ACCEL_REDIRECT`` names an internal location that the
+front-end server maps onto MEDIA_ROOT, the view only checks access and
+replies with an empty ``X-Accel-Redirect`` response; nginx then streams the
+file, ranges included, without holding a Python worker.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [t.strip().removeprefix("W/") for t in header.split(",")]
+
+
+def _byte_range(header, size):
+    """``(start, end)`` inclusive for a single satisfiable range, ``None`` to send
+    the whole file, or ``False`` when the range cannot be satisfied."""
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+def _read_range(f, start, length):
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def serve(request, storage, name, etag=None, filename=None, as_attachment=False, cache_control="private, max-age=0"):
+    """Respond with the stored file ``name``.
+
+    ``etag`` is the unquoted validator, normally the content hash; without
+    one it is derived from the file's size and mtime.
+    """
+    try:
+        path = storage.path(name)
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("File not found.")
+    etag = quote_etag(etag or f"{int(stat.st_mtime):x}-{stat.st_size:x}")
+    filename = filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponseNotModified()
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    disposition = content_disposition_header(as_attachment, filename)
+
+    accel = getattr(settings, "MEDIA_ACCEL_REDIRECT", "")
+    if accel:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response["X-Accel-Redirect"] = accel.rstrip("/") + "/" + quote(name)
+        if disposition:
+            response["Content-Disposition"] = disposition
+        return response
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    # If-Range: only honour the range while the client's copy is current.
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        byte_range = _byte_range(range_header, stat.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+
+    f = open(path, "rb")
+    if byte_range is None:
+        response = FileResponse(f, content_type=content_type, headers=headers)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(f, start, end - start + 1), status=206, content_type=content_type, headers=headers
+        )
+        response._resource_closers.append(f.close)  # in case the body is never iterated
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+    if disposition:
+        response["Content-Disposition"] = disposition
+    return response
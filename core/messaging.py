@@ -0,0 +1,31 @@
+from django.db import transaction
+
+from . import jobs
+from .models import Conversation, CustomUser, Message
+
+
+@transaction.atomic
+def deliver(message):
+    """Save ``message`` and update the sender/receiver conversation summary."""
+    message.save()
+    Conversation.objects.record(message)
+    return message
+
+
+def send_message(sender, receiver, text="", attachment=None):
+    return deliver(Message(sender=sender, receiver=receiver, text=text, attachment=attachment))
+
+
+@jobs.handler("message.send")
+def _send_job(payload):
+    send_message(sender=CustomUser.objects.get(pk=payload["sender"]),
+                 receiver=CustomUser.objects.get(pk=payload["receiver"]),
+                 text=payload["text"])
+
+
+def notify(sender, receiver, text, key):
+    """Queue a chat message from ``sender`` to ``receiver``, sent by the job worker.
+
+    ``key`` identifies the event being announced so it is sent at most once.
+    """
+    jobs.enqueue("message.send", {"sender": sender.pk, "receiver": receiver.pk, "text": text}, key=key)
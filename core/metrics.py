@@ -0,0 +1,279 @@
+"""Per-process request, SQL and template metrics in Prometheus text format.
+
+MetricsMiddleware times each request and files it under the URL name. A
+database execute wrapper, attached to every connection as it is created,
+adds query counts and SQL time to the running request, and a wrapper around
+the Django template backend adds render time. Statements slower than
+``METRICS_SLOW_QUERY_MS`` are also kept as samples keyed by normalized SQL
+and calling view.
+
+The hot path takes no locks: each thread updates its own shard of counters
+and ``render()`` sums the shards when ``/metrics`` is scraped. Shards of
+threads that have exited are folded into one base total, so servers that
+recycle threads do not grow the list. The only per-request allocation is one
+``_Request`` slot object.
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from . import cache
+from .sql import normalize_sql
+
+# Upper bounds, in seconds, of the request latency histogram.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_SLOW_SHAPES = 200
+RECENT_SLOW = 50
+UNRESOLVED = "<unresolved>"
+
+_current = ContextVar("metrics_request", default=None)
+
+
+class _Request:
+    __slots__ = ("view", "queries", "sql_time", "template_time")
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+
+class _ViewStats:
+    __slots__ = ("requests", "errors", "buckets", "duration", "queries", "sql_time", "template_time")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+
+_local = threading.local()
+_shards = {}  # live thread -> its {view: _ViewStats}
+_retired = {}  # totals from threads that have exited
+_slow = {}
+_recent_slow = deque(maxlen=RECENT_SLOW)
+_lock = threading.Lock()  # guards shard registration and slow-query samples only
+
+
+def _shard():
+    try:
+        return _local.views
+    except AttributeError:
+        views = _local.views = {}
+        with _lock:
+            _retire_dead()
+            _shards[threading.current_thread()] = views
+        return views
+
+
+def _merge(into, views):
+    for view, s in list(views.items()):
+        m = into.get(view)
+        if m is None:
+            m = into[view] = _ViewStats()
+        m.requests += s.requests
+        m.errors += s.errors
+        m.duration += s.duration
+        m.queries += s.queries
+        m.sql_time += s.sql_time
+        m.template_time += s.template_time
+        for i, n in enumerate(s.buckets):
+            m.buckets[i] += n
+
+
+def _retire_dead():
+    # A finished thread can no longer write to its shard. Call with _lock held.
+    for thread in [t for t in _shards if not t.is_alive()]:
+        _merge(_retired, _shards.pop(thread))
+
+
+def _slow_threshold():
+    return getattr(settings, "METRICS_SLOW_QUERY_MS", 200) / 1000
+
+
+def observe(view, duration, status, req):
+    views = _shard()
+    stats = views.get(view)
+    if stats is None:
+        stats = views[view] = _ViewStats()
+    stats.requests += 1
+    if status >= 500:
+        stats.errors += 1
+    i = 0
+    for bound in BUCKETS:
+        if duration <= bound:
+            break
+        i += 1
+    stats.buckets[i] += 1
+    stats.duration += duration
+    stats.queries += req.queries
+    stats.sql_time += req.sql_time
+    stats.template_time += req.template_time
+
+
+def _record_slow(view, sql, elapsed):
+    shape = normalize_sql(sql)
+    with _lock:
+        _recent_slow.append((view, shape, elapsed))
+        key = (view, shape)
+        sample = _slow.get(key)
+        if sample is None:
+            if len(_slow) >= MAX_SLOW_SHAPES:
+                return
+            sample = _slow[key] = [0, 0.0, 0.0]
+        sample[0] += 1
+        sample[1] += elapsed
+        sample[2] = max(sample[2], elapsed)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        req = _current.get()
+        if req is not None:
+            req.queries += 1
+            req.sql_time += elapsed
+        if elapsed >= _slow_threshold():
+            _record_slow(req.view if req is not None and req.view else UNRESOLVED, sql, elapsed)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver: time every statement on ``connection``."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def instrument_templates():
+    """Wrap the Django template backend so top-level renders are timed."""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "_metrics", False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        req = _current.get()
+        if req is None:
+            return original(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            req.template_time += time.perf_counter() - started
+
+    render._metrics = True
+    Template.render = render
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and template time per URL name. Put it first in MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        req = _Request()
+        token = _current.set(req)
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            duration = time.perf_counter() - started
+            _current.reset(token)
+            observe(req.view or UNRESOLVED, duration, status, req)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Lets slow-query samples name the view that issued them.
+        req = _current.get()
+        if req is not None:
+            req.view = request.resolver_match.view_name
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _totals():
+    merged = {}
+    with _lock:
+        _retire_dead()
+        _merge(merged, _retired)
+        shards = list(_shards.values())
+    for shard in shards:
+        _merge(merged, shard)
+    return merged
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    views = _totals()
+    out = []
+
+    def family(name, kind, help_text):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    family("http_request_duration_seconds", "histogram", "Request latency by URL name.")
+    for view, s in sorted(views.items()):
+        v = _label(view)
+        cumulative = 0
+        for bound, n in zip((*BUCKETS, "+Inf"), s.buckets):
+            cumulative += n
+            out.append(f'http_request_duration_seconds_bucket{{view="{v}",le="{bound}"}} {cumulative}')
+        out.append(f'http_request_duration_seconds_sum{{view="{v}"}} {s.duration:.6f}')
+        out.append(f'http_request_duration_seconds_count{{view="{v}"}} {s.requests}')
+
+    simple = (
+        ("http_request_errors_total", "Responses with a 5xx status.", "errors", "{}"),
+        ("db_queries_total", "SQL statements executed while serving the view.", "queries", "{}"),
+        ("db_query_duration_seconds_total", "Time spent in SQL while serving the view.", "sql_time", "{:.6f}"),
+        ("template_render_seconds_total", "Time spent rendering templates for the view.", "template_time", "{:.6f}"),
+    )
+    for name, help_text, attr, fmt in simple:
+        family(name, "counter", help_text)
+        for view, s in sorted(views.items()):
+            out.append(f'{name}{{view="{_label(view)}"}} {fmt.format(getattr(s, attr))}')
+
+    with _lock:
+        slow = [(k, list(v)) for k, v in _slow.items()]
+    family("db_slow_queries_total", "counter", "Statements over the slow-query threshold, by view and normalized SQL.")
+    for (view, sql), (count, _, _) in sorted(slow):
+        out.append(f'db_slow_queries_total{{view="{_label(view)}",sql="{_label(sql)}"}} {count}')
+    family("db_slow_query_max_seconds", "gauge", "Slowest sample per view and normalized SQL.")
+    for (view, sql), (_, _, worst) in sorted(slow):
+        out.append(f'db_slow_query_max_seconds{{view="{_label(view)}",sql="{_label(sql)}"}} {worst:.6f}')
+
+    family("cache_events_total", "counter", "Page and fragment cache lookups.")
+    for key, count in sorted(cache.stats().items()):
+        kind, result = key.split(":")
+        out.append(f'cache_events_total{{kind="{kind}",result="{result}"}} {count}')
+    return "\n".join(out) + "\n"
+
+
+def recent_slow_queries():
+    """The latest slow statements as ``(view, normalized_sql, seconds)``, oldest first."""
+    with _lock:
+        return list(_recent_slow)
+
+
+def reset():
+    with _lock:
+        _retired.clear()
+        for shard in _shards.values():
+            shard.clear()
+        _slow.clear()
+        _recent_slow.clear()
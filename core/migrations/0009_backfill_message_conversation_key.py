@@ -0,0 +1,40 @@
+from django.db import migrations, transaction
+from django.db.models.functions import Greatest, Least
+
+# Rows per transaction. Each chunk commits on its own, and only rows that are
+# still NULL are touched, so an interrupted run simply picks up where it left
+# off when the migration is applied again.
+CHUNK_SIZE = 5000
+
+
+def backfill_conversation_key(apps, schema_editor):
+    Message = apps.get_model('core', 'Message')
+    db = schema_editor.connection.alias
+    pending = Message.objects.using(db).filter(conversation_key__isnull=True)
+    key = Least('sender_id', 'receiver_id') * (1 << 32) + Greatest('sender_id', 'receiver_id')
+
+    last_pk = 0
+    while True:
+        ids = list(
+            pending.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        with transaction.atomic(using=db):
+            pending.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(conversation_key=key)
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_message_conversation_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_conversation_key, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_message_msg_conv_ts_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='proj_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_at', 'id'], name='proj_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectskill',
+            index=models.Index(fields=['skill', 'project'], name='projskill_skill_proj_idx'),
+        ),
+    ]
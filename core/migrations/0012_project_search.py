@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE project_search_fts USING fts5("
+    "title, description, skills_text, content='project_search', content_rowid='project_id')",
+    "CREATE TRIGGER project_search_ai AFTER INSERT ON project_search BEGIN "
+    "INSERT INTO project_search_fts(rowid, title, description, skills_text) "
+    "VALUES (new.project_id, new.title, new.description, new.skills_text); END",
+    "CREATE TRIGGER project_search_ad AFTER DELETE ON project_search BEGIN "
+    "INSERT INTO project_search_fts(project_search_fts, rowid, title, description, skills_text) "
+    "VALUES ('delete', old.project_id, old.title, old.description, old.skills_text); END",
+    "CREATE TRIGGER project_search_au AFTER UPDATE ON project_search BEGIN "
+    "INSERT INTO project_search_fts(project_search_fts, rowid, title, description, skills_text) "
+    "VALUES ('delete', old.project_id, old.title, old.description, old.skills_text); "
+    "INSERT INTO project_search_fts(rowid, title, description, skills_text) "
+    "VALUES (new.project_id, new.title, new.description, new.skills_text); END",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE project_search ADD FULLTEXT INDEX project_search_ft '
+            '(title, description, skills_text)'
+        )
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE project_search DROP INDEX project_search_ft')
+    elif vendor == 'sqlite':
+        for trigger in ('project_search_ai', 'project_search_ad', 'project_search_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        schema_editor.execute('DROP TABLE IF EXISTS project_search_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_project_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSearchDocument',
+            fields=[
+                ('project', models.OneToOneField(db_column='project_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='core.project')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('skills_text', models.TextField(blank=True)),
+            ],
+            options={
+                'db_table': 'project_search',
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_project_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FreelancerStats',
+            fields=[
+                ('user', models.OneToOneField(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='freelancer_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('username', models.CharField(max_length=150)),
+                ('location', models.CharField(blank=True, max_length=100)),
+                ('skills_text', models.TextField(blank=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('avg_rating', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'freelancer_stats',
+                'indexes': [models.Index(fields=['avg_rating', 'user'], name='fstats_rating_idx')],
+            },
+        ),
+    ]
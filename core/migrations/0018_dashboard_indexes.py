@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_export_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['client', 'created_at', 'id'], name='proj_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['project', 'submitted_at', 'id'], name='proposal_project_submitted_idx'),
+        ),
+    ]
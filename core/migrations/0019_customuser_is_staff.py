@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='is_staff',
+            field=models.BooleanField(default=False, help_text='Can log into the admin site.'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='picture_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+from django.db import migrations, transaction
+
+# Projects per transaction. Only projects without a search document are
+# touched, so an interrupted run picks up where it left off when applied again.
+CHUNK_SIZE = 2000
+
+
+def backfill_project_search(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    ProjectSkill = apps.get_model('core', 'ProjectSkill')
+    ProjectSearchDocument = apps.get_model('core', 'ProjectSearchDocument')
+    db = schema_editor.connection.alias
+    missing = Project.objects.using(db).filter(search_document__isnull=True)
+
+    last_pk = 0
+    while True:
+        rows = list(
+            missing.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'title', 'description')[:CHUNK_SIZE]
+        )
+        if not rows:
+            break
+        skills = defaultdict(list)
+        for project_id, name in (
+            ProjectSkill.objects.using(db)
+            .filter(project_id__in=[r[0] for r in rows])
+            .values_list('project_id', 'skill__name')
+        ):
+            skills[project_id].append(name)
+        with transaction.atomic(using=db):
+            ProjectSearchDocument.objects.using(db).bulk_create(
+                [
+                    ProjectSearchDocument(
+                        # Sorted by name, as core.search.index_project writes them.
+                        project_id=pk, title=title, description=description,
+                        skills_text=' '.join(sorted(skills[pk])),
+                    )
+                    for pk, title, description in rows
+                ],
+                ignore_conflicts=True,
+            )
+        last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0021_customuser_picture_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_project_search, migrations.RunPython.noop, elidable=True),
+    ]
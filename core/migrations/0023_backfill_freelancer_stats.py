@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+from django.db import migrations, transaction
+from django.db.models import Count
+
+# Freelancers per transaction. Only freelancers without a stats row are
+# touched, so an interrupted run picks up where it left off when applied again.
+CHUNK_SIZE = 1000
+
+
+def backfill_freelancer_stats(apps, schema_editor):
+    CustomUser = apps.get_model('core', 'CustomUser')
+    UserSkill = apps.get_model('core', 'UserSkill')
+    Review = apps.get_model('core', 'Review')
+    FreelancerStats = apps.get_model('core', 'FreelancerStats')
+    db = schema_editor.connection.alias
+    missing = CustomUser.objects.using(db).filter(is_freelancer=True, freelancer_stats__isnull=True)
+
+    last_pk = 0
+    while True:
+        users = list(
+            missing.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'username', 'location')[:CHUNK_SIZE]
+        )
+        if not users:
+            break
+        ids = [u[0] for u in users]
+        skills = defaultdict(list)
+        for user_id, name in UserSkill.objects.using(db).filter(user_id__in=ids).values_list('user_id', 'skill__name'):
+            skills[user_id].append(name)
+        stars = defaultdict(lambda: [0] * 6)
+        for user_id, rating, count in (
+            Review.objects.using(db).filter(proposal__freelancer_id__in=ids)
+            .values_list('proposal__freelancer_id', 'rating')
+            .annotate(count=Count('id'))
+            .order_by()
+        ):
+            stars[user_id][rating] = count
+
+        rows = []
+        for user_id, username, location in users:
+            histogram = stars[user_id]
+            review_count = sum(histogram)
+            rating_total = sum(rating * n for rating, n in enumerate(histogram))
+            rows.append(FreelancerStats(
+                user_id=user_id,
+                username=username,
+                location=location,
+                # Sorted by name, then lowercased, as core.search.index_freelancer writes them.
+                skills_text=' '.join(n.lower() for n in sorted(skills[user_id])),
+                review_count=review_count,
+                rating_total=rating_total,
+                avg_rating=rating_total / review_count if review_count else 0,
+                **{f'stars_{i}': histogram[i] for i in range(1, 6)},
+            ))
+        with transaction.atomic(using=db):
+            FreelancerStats.objects.using(db).bulk_create(rows, ignore_conflicts=True)
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0022_backfill_project_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_freelancer_stats, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:38
+
+import core.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_project_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='created_at',
+            field=core.models.CreatedAtField(),
+        ),
+        migrations.AlterField(
+            model_name='proposal',
+            name='submitted_at',
+            field=core.models.CreatedAtField(),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='created_at',
+            field=core.models.CreatedAtField(),
+        ),
+    ]
@@ -1,8 +1,51 @@
+import os
+
 from django.db import models
+from django.db.models import Case, F, Q, Value, When
 from django.utils import timezone
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.conf import settings
 
+from .storage import attachment_storage
+
+
+class CreatedAtField(models.DateTimeField):
+    """Like ``auto_now_add``, but an insert keeps a time already set on the object.
+
+    Bulk loads (core.importer, seed_data) stamp their rows themselves; the
+    field instance is shared by every thread, so it is never reconfigured.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("blank", True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs.pop("editable", None)
+        kwargs.pop("blank", None)
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        if add and getattr(model_instance, self.attname) is None:
+            value = timezone.now()
+            setattr(model_instance, self.attname, value)
+            return value
+        return super().pre_save(model_instance, add)
+
+
+# What staff may do in the admin; there are no permission tables. Edits that
+# would bypass core's bookkeeping (proposal acceptance, rating aggregates,
+# conversation summaries, search text) are left to the site itself.
+STAFF_PERMISSIONS = frozenset({
+    "core.view_project", "core.change_project",
+    "core.view_proposal",
+    "core.view_message",
+    "core.view_review",
+    "core.view_skilltag", "core.add_skilltag",
+})
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, username, password=None, **extra_fields):
@@ -17,6 +60,7 @@ class CustomUserManager(BaseUserManager):
         return user
 
     def create_superuser(self, username, password=None, **extra_fields):
+        extra_fields.setdefault("is_staff", True)
         return self.create_user(username, password=password, **extra_fields)
 
 
@@ -29,10 +73,13 @@ class CustomUser(AbstractBaseUser):
 
     is_client = models.BooleanField(default=False)
     is_freelancer = models.BooleanField(default=False)
+    is_staff = models.BooleanField(default=False, help_text="Can log into the admin site.")
 
     bio = models.TextField(blank=True)
     location = models.CharField(max_length=100, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Thumbnails of profile_picture by size and format; filled in by core.thumbnails.
+    picture_variants = models.JSONField(default=dict, blank=True)
 
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["email", "name"]
@@ -45,6 +92,12 @@ class CustomUser(AbstractBaseUser):
     def __str__(self):
         return self.username
 
+    def has_perm(self, perm, obj=None):
+        return self.is_active and self.is_staff and perm in STAFF_PERMISSIONS
+
+    def has_module_perms(self, app_label):
+        return self.is_active and self.is_staff and app_label == "core"
+
 
 class SkillTag(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -68,7 +121,9 @@ class Project(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     budget = models.DecimalField(max_digits=10, decimal_places=2)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = CreatedAtField()
+    # Watermark for core.recommend; update() and save(update_fields=...) callers must set it too.
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="new")
 
     # ⬇⬇⬇ add the explicit M2M using your join table
@@ -81,20 +136,117 @@ class Project(models.Model):
 
     class Meta:
         db_table = "projects"
+        indexes = [
+            models.Index(fields=["status", "created_at", "id"], name="proj_status_created_idx"),
+            models.Index(fields=["created_at", "id"], name="proj_created_idx"),
+            models.Index(fields=["client", "created_at", "id"], name="proj_client_created_idx"),
+            models.Index(fields=["updated_at"], name="proj_updated_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class ProjectSearchDocument(models.Model):
+    """Denormalized search text for a project.
+
+    The full-text index itself is created per backend in the migration:
+    a FULLTEXT index on MySQL, an FTS5 table kept in sync by triggers on
+    SQLite. Queries go through core.search.
+    """
+
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column="project_id",
+        related_name="search_document",
+    )
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    skills_text = models.TextField(blank=True)
+
+    class Meta:
+        db_table = "project_search"
+
+
+class FreelancerStats(models.Model):
+    """Per-freelancer search and rating row behind ``browse_freelancers``.
+
+    Kept current by core.search: ``index_freelancer`` when the profile or its
+    skills change, ``record_review`` when a review is saved.
+    """
+
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column="user_id",
+        related_name="freelancer_stats",
+    )
+    username = models.CharField(max_length=150)
+    location = models.CharField(max_length=100, blank=True)
+    skills_text = models.TextField(blank=True)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    avg_rating = models.FloatField(default=0)
+    # Rating histogram: number of reviews with 1..5 stars.
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "freelancer_stats"
+        indexes = [
+            models.Index(fields=["avg_rating", "user"], name="fstats_rating_idx"),
+        ]
+
+    def histogram(self):
+        """``[(stars, count, percent), ...]`` from 5 stars down to 1."""
+        rows = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f"stars_{stars}")
+            percent = round(100 * count / self.review_count) if self.review_count else 0
+            rows.append((stars, count, percent))
+        return rows
+
+
+CONVERSATION_KEY_SHIFT = 1 << 32
+
+
+def conversation_key(user_a_id, user_b_id):
+    """Canonical key for the pair, identical whichever side sent the message."""
+    low, high = sorted((user_a_id, user_b_id))
+    return low * CONVERSATION_KEY_SHIFT + high
+
+
 class Message(models.Model):
     sender = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='received_messages')
     text = models.TextField(blank=True)
-    attachment = models.FileField(upload_to='attachments/', blank=True, null=True)
+    attachment = models.FileField(upload_to='attachments/', storage=attachment_storage, blank=True, null=True)
+    attachment_name = models.CharField(max_length=255, blank=True)  # as uploaded; the stored name is a hash
     timestamp = models.DateTimeField(default=timezone.now)
+    # (low user id << 32) + high user id; lets a whole chat be read as one
+    # index range instead of an OR over sender/receiver.
+    conversation_key = models.BigIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = "messages"
+        indexes = [
+            models.Index(fields=["conversation_key", "timestamp"], name="msg_conv_ts_idx"),
+            models.Index(fields=["timestamp", "id"], name="msg_ts_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.conversation_key is None:
+            self.conversation_key = conversation_key(self.sender_id, self.receiver_id)
+        if self.attachment and not self.attachment._committed:
+            self.attachment_name = os.path.basename(self.attachment.name)[:255]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         txt = (self.text or "").strip()
@@ -102,6 +254,90 @@ class Message(models.Model):
             return txt[:50] + ("…" if len(txt) > 50 else "")
         return f"Message from {self.sender.username} to {self.receiver.username}"
 
+    def preview(self, length=120):
+        txt = (self.text or "").strip()
+        if txt:
+            return txt[:length - 1] + "…" if len(txt) > length else txt
+        if self.attachment:
+            return "📎 Attachment"
+        return ""
+
+
+class ConversationManager(models.Manager):
+    def for_user(self, user):
+        return (
+            self.filter(Q(user_low=user) | Q(user_high=user))
+            .select_related("user_low", "user_high")
+            .order_by("-last_message_at")
+        )
+
+    def record(self, message):
+        """Fold a newly saved message into its conversation summary row."""
+        low, high = sorted((message.sender_id, message.receiver_id))
+        preview = message.preview()
+        conversation, created = self.get_or_create(
+            user_low_id=low,
+            user_high_id=high,
+            defaults={
+                "last_message_at": message.timestamp,
+                "last_message_preview": preview,
+                "last_sender_id": message.sender_id,
+                "message_count": 1,
+            },
+        )
+        if not created:
+            # Messages can arrive out of timestamp order (e.g. seeded or imported
+            # rows), so only move the "last message" columns forward.
+            newer = Q(last_message_at__lte=message.timestamp)
+            self.filter(pk=conversation.pk).update(
+                message_count=F("message_count") + 1,
+                last_message_at=Case(
+                    When(newer, then=Value(message.timestamp)),
+                    default=F("last_message_at"),
+                    output_field=models.DateTimeField(),
+                ),
+                last_message_preview=Case(
+                    When(newer, then=Value(preview)),
+                    default=F("last_message_preview"),
+                    output_field=models.CharField(),
+                ),
+                last_sender_id=Case(
+                    When(newer, then=Value(message.sender_id)),
+                    default=F("last_sender_id"),
+                    output_field=models.IntegerField(),
+                ),
+            )
+        return conversation
+
+
+class Conversation(models.Model):
+    """One row per pair of users, kept up to date as messages are sent."""
+
+    user_low = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="+")
+    user_high = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="+")
+    last_message_at = models.DateTimeField()
+    last_message_preview = models.CharField(max_length=120, blank=True)
+    last_sender = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    message_count = models.PositiveIntegerField(default=0)
+
+    objects = ConversationManager()
+
+    class Meta:
+        db_table = "conversations"
+        unique_together = (("user_low", "user_high"),)
+        indexes = [
+            models.Index(fields=["user_low", "-last_message_at"], name="conv_low_last_idx"),
+            models.Index(fields=["user_high", "-last_message_at"], name="conv_high_last_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_low} ↔ {self.user_high}"
+
+    def partner_for(self, user):
+        return self.user_high if self.user_low_id == user.pk else self.user_low
+
 
 class Proposal(models.Model):
     STATUS_CHOICES = [
@@ -116,11 +352,16 @@ class Proposal(models.Model):
     freelancer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     message = models.TextField()
     proposed_price = models.DecimalField(max_digits=10, decimal_places=2)
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = CreatedAtField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
 
     class Meta:
         db_table = "proposals"
+        indexes = [
+            models.Index(fields=["project", "status"], name="proposal_project_status_idx"),
+            models.Index(fields=["submitted_at", "id"], name="proposal_submitted_idx"),
+            models.Index(fields=["project", "submitted_at", "id"], name="proposal_project_submitted_idx"),
+        ]
 
     def __str__(self):
         return f"{self.freelancer} → {self.project.title}"
@@ -132,10 +373,13 @@ class Review(models.Model):
     )
     rating = models.IntegerField(choices=[(i, str(i)) for i in range(1, 6)])
     comment = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = CreatedAtField()
 
     class Meta:
         db_table = "reviews"
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="review_created_idx"),
+        ]
 
     def __str__(self):
         return f"Review for {self.proposal.freelancer.username} on {self.proposal.project.title}"
@@ -152,6 +396,9 @@ class ProjectSkill(models.Model):
     class Meta:
         db_table = "project_skills"
         unique_together = (("project", "skill"),)
+        indexes = [
+            models.Index(fields=["skill", "project"], name="projskill_skill_proj_idx"),
+        ]
 
 
 class UserSkill(models.Model):
@@ -163,7 +410,60 @@ class UserSkill(models.Model):
         unique_together = (("user", "skill"),)
 
 
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by ``manage.py run_jobs``."""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    # 191 chars keeps the unique index within InnoDB's limit under utf8mb4.
+    idempotency_key = models.CharField(max_length=191, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "jobs"
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_run_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
 CustomUser.add_to_class(
     "skills",
     models.ManyToManyField(SkillTag, through="UserSkill", blank=True),
 )
+
+
+class Blob(models.Model):
+    """One stored attachment file, shared by every message that uploaded the same bytes."""
+
+    digest = models.CharField(max_length=64, primary_key=True)  # sha256, hex
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True)  # when refcount last dropped to 0
+
+    class Meta:
+        db_table = "blobs"
+        indexes = [
+            models.Index(fields=["refcount", "released_at"], name="blob_gc_idx"),
+        ]
+
+    def __str__(self):
+        return self.digest
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Project, Proposal
+
+ACCEPTED = "accepted"
+CONFLICT = "conflict"          # the project already left "new" (another proposal won)
+NOT_PENDING = "not_pending"    # this proposal was withdrawn, rejected or already decided
+
+
+@transaction.atomic
+def accept_proposal(proposal):
+    """Accept ``proposal`` and reject its pending siblings, at most once per project.
+
+    The guard is a single conditional UPDATE moving the project from "new" to
+    "ongoing". Only one transaction can match that row; a concurrent accept
+    waits on its row lock and then matches nothing, so it returns CONFLICT
+    without having read or locked any proposal.
+    """
+    won = Project.objects.filter(pk=proposal.project_id, status="new").update(
+        status="ongoing", updated_at=timezone.now()
+    )
+    if not won:
+        return CONFLICT
+    accepted = Proposal.objects.filter(pk=proposal.pk, status="pending").update(status="accepted")
+    if not accepted:
+        transaction.set_rollback(True)
+        return NOT_PENDING
+    # Served from proposal_project_status_idx: only still-pending rows are touched.
+    Proposal.objects.filter(project_id=proposal.project_id, status="pending").update(status="rejected")
+    return ACCEPTED
+
+
+def reject_proposal(proposal):
+    """Reject ``proposal`` if it is still pending; returns whether it was."""
+    return bool(Proposal.objects.filter(pk=proposal.pk, status="pending").update(status="rejected"))
@@ -0,0 +1,370 @@
+"""Skill-overlap recommendations of open projects for freelancers.
+
+The process keeps every open (``status="new"``) project in memory as an
+integer bitset of skill ids, with an inverted index from skill to project.
+A freelancer's skills become the same kind of bitset, so candidates are the
+union of a few index entries and each is scored with one AND and popcount:
+
+    score = 0.6 * share of the project's skills the freelancer has
+          + 0.25 * recency (halves every RECENCY_HALF_LIFE days)
+          + 0.15 * budget (log-scaled against the largest open budget)
+
+The index refreshes incrementally: when the "projects" cache generation
+moves, or at least every CHECK_INTERVAL seconds, it reads only the projects
+whose ``updated_at`` moved since the last refresh (via proj_updated_idx),
+indexing the open ones and dropping the rest. The window reaches back
+WATERMARK_OVERLAP before the previous read, so a transaction that stamped
+its rows earlier but committed later is still seen; deleted projects leave
+no trace and go at the hourly rebuild.
+
+The reverse direction, freelancers to suggest for a project, uses an
+inverted index from skill to freelancer built from UserSkill, ranked by
+overlap and the rating stored in FreelancerStats. It refreshes from the
+stats rows whose ``updated_at`` moved, with the same overlap, which covers
+profile and skill edits and new reviews.
+
+Both indexes read the primary. They refresh when a generation moves, and a
+replica that has not caught up with the write behind it would leave the
+index stale until the next one.
+"""
+import heapq
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from . import cache
+from .listings import PROJECT_FIELDS, load_projects
+from .models import FreelancerStats, Project, ProjectSkill, Proposal, UserSkill
+from .skills import registry as skill_registry
+
+CHECK_INTERVAL = 30
+REBUILD_INTERVAL = 3600
+RECENCY_HALF_LIFE = 14  # days
+WEIGHTS = (0.6, 0.25, 0.15)  # overlap, recency, budget
+SUGGEST_WEIGHTS = (0.7, 0.3)  # overlap, rating
+MAX_K = 50
+# How far each incremental read reaches back before the previous one; covers
+# transactions that commit this long after stamping updated_at.
+WATERMARK_OVERLAP = timedelta(minutes=2)
+
+
+def _skill_ids(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class _Entry:
+    __slots__ = ("bits", "size", "created", "budget")
+
+    def __init__(self, bits, size, created, budget):
+        self.bits = bits
+        self.size = size
+        self.created = created
+        self.budget = budget
+
+
+class ProjectIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._entries = {}
+        self._by_skill = {}
+        self._watermark = None
+        self._max_log_budget = 1.0
+        self._version = None
+        self._checked = 0.0
+        self._built = 0.0
+
+    # -- maintenance ---------------------------------------------------
+
+    def _stale(self, now):
+        return (
+            now - self._checked >= CHECK_INTERVAL
+            or cache.version_token("projects") != self._version
+        )
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and not self._stale(now):
+            return
+        # One thread refreshes while the others keep serving the current
+        # index; only the very first build makes callers wait.
+        if not self._refresh_lock.acquire(blocking=force or not self._built):
+            return
+        try:
+            if not force and not self._stale(now):
+                return
+            version = cache.version_token("projects")
+            if force or not self._built or now - self._built >= REBUILD_INTERVAL:
+                self._rebuild()
+                self._built = now
+            else:
+                self._update()
+            self._version = version
+            self._checked = now
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self, projects, skills):
+        """Entries for ``(id, created_at, budget)`` rows and ``(project_id, skill_id)`` pairs."""
+        entries = {}
+        for project_id, created, budget in projects:
+            entries[project_id] = _Entry(0, 0, created.timestamp(), float(budget))
+        for project_id, skill_id in skills:
+            e = entries.get(project_id)
+            if e is not None:  # created after the project rows were read
+                e.bits |= 1 << skill_id
+                e.size += 1
+        return entries
+
+    def _index(self, entries):
+        for project_id, e in entries.items():
+            self._entries[project_id] = e
+            self._max_log_budget = max(self._max_log_budget, math.log1p(e.budget))
+            for skill_id in _skill_ids(e.bits):
+                self._by_skill.setdefault(skill_id, set()).add(project_id)
+
+    def _drop(self, project_ids):
+        for project_id in project_ids:
+            e = self._entries.pop(project_id, None)
+            if e is None:
+                continue
+            for skill_id in _skill_ids(e.bits):
+                self._by_skill.get(skill_id, set()).discard(project_id)
+
+    # Queries run before taking self._lock, which only guards the in-memory swap.
+
+    def _rebuild(self):
+        started = timezone.now()
+        entries = self._load(
+            Project.objects.using(DEFAULT_DB_ALIAS).filter(status="new").values_list("id", "created_at", "budget"),
+            ProjectSkill.objects.using(DEFAULT_DB_ALIAS).filter(project__status="new")
+            .values_list("project_id", "skill_id"),
+        )
+        with self._lock:
+            self._entries, self._by_skill, self._max_log_budget = {}, {}, 1.0
+            self._index(entries)
+            self._watermark = started
+
+    def _update(self):
+        started = timezone.now()
+        changed = list(
+            Project.objects.using(DEFAULT_DB_ALIAS).filter(updated_at__gte=self._watermark - WATERMARK_OVERLAP)
+            .values_list("id", "status", "created_at", "budget")
+        )
+        still_open = [(pid, created, budget) for pid, status, created, budget in changed if status == "new"]
+        entries = {}
+        if still_open:
+            entries = self._load(
+                still_open,
+                ProjectSkill.objects.using(DEFAULT_DB_ALIAS).filter(project_id__in=[r[0] for r in still_open])
+                .values_list("project_id", "skill_id"),
+            )
+        with self._lock:
+            # Re-index changed projects from scratch: budget or skills may have moved.
+            self._drop([pid for pid, *_ in changed])
+            self._index(entries)
+            self._watermark = started
+
+    # -- queries -------------------------------------------------------
+
+    def top(self, skill_ids, k=10, exclude=()):
+        """``[(project_id, score), ...]`` best first, for a set of skill ids."""
+        self.refresh()
+        user_bits = 0
+        for skill_id in skill_ids:
+            user_bits |= 1 << skill_id
+        # Snapshot the candidates under the lock; entries are never mutated
+        # once indexed, so scoring can then run without it.
+        with self._lock:
+            candidates = set()
+            for skill_id in skill_ids:
+                candidates |= self._by_skill.get(skill_id, set())
+            candidates.difference_update(exclude)
+            entries = {pid: self._entries[pid] for pid in candidates}
+            max_budget = self._max_log_budget
+        if not entries:
+            return []
+
+        now = timezone.now().timestamp()
+        decay = math.log(2) / timedelta(days=RECENCY_HALF_LIFE).total_seconds()
+        w_overlap, w_recency, w_budget = WEIGHTS
+
+        def score(project_id):
+            e = entries[project_id]
+            overlap = (e.bits & user_bits).bit_count() / e.size
+            recency = math.exp(-decay * max(0.0, now - e.created))
+            budget = math.log1p(e.budget) / max_budget
+            return w_overlap * overlap + w_recency * recency + w_budget * budget
+
+        scored = ((score(pid), pid) for pid in entries)
+        return [(pid, round(s, 4)) for s, pid in heapq.nlargest(k, scored)]
+
+
+index = ProjectIndex()
+
+
+def for_freelancer(user, k=10):
+    """Top ``k`` open projects for ``user`` as ``[(ProjectRow, score), ...]``.
+
+    Projects the freelancer already bid on are left out.
+    """
+    k = max(1, min(k, MAX_K))
+    skill_ids = list(UserSkill.objects.filter(user_id=user.pk).values_list("skill_id", flat=True))
+    if not skill_ids:
+        return []
+    bid_on = Proposal.objects.filter(freelancer_id=user.pk, project__status="new").values_list("project_id", flat=True)
+    ranked = index.top(skill_ids, k, exclude=set(bid_on))
+    if not ranked:
+        return []
+    # The index may lag a project that has just closed; only open ones are shown.
+    rows = {r.id: r for r in load_projects(
+        Project.objects.filter(id__in=[pid for pid, _ in ranked], status="new").values(*PROJECT_FIELDS)
+    )}
+    return [(rows[pid], s) for pid, s in ranked if pid in rows]
+
+
+class _Freelancer:
+    __slots__ = ("user_id", "username", "avg_rating", "review_count", "bits")
+
+    def __init__(self, user_id, username, avg_rating, review_count):
+        self.user_id = user_id
+        self.username = username
+        self.avg_rating = avg_rating
+        self.review_count = review_count
+        self.bits = 0
+
+
+class Suggestion(NamedTuple):
+    user_id: int
+    username: str
+    avg_rating: float
+    review_count: int
+    matched: list
+    score: float
+
+
+class FreelancerIndex:
+    """Skill id -> freelancer ids, with each freelancer's skills and rating."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._people = {}
+        self._by_skill = {}
+        self._watermark = None
+        self._version = None
+        self._checked = 0.0
+        self._built = 0.0
+
+    def _stale(self, now):
+        return (
+            now - self._checked >= CHECK_INTERVAL
+            or cache.version_token("users") != self._version
+        )
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and not self._stale(now):
+            return
+        if not self._refresh_lock.acquire(blocking=force or not self._built):
+            return
+        try:
+            if not force and not self._stale(now):
+                return
+            version = cache.version_token("users")
+            # Deleted stats rows (users who stopped freelancing) leave no
+            # updated_at trace, so a periodic rebuild drops them.
+            rebuild = force or not self._built or now - self._built >= REBUILD_INTERVAL
+            self._apply(self._load(None if rebuild else self._watermark), rebuild)
+            if rebuild:
+                self._built = now
+            self._version = version
+            self._checked = now
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self, since):
+        stats = FreelancerStats.objects.using(DEFAULT_DB_ALIAS)
+        if since is not None:
+            # Rows saved in the overlap are re-read, which is harmless.
+            stats = stats.filter(updated_at__gte=since - WATERMARK_OVERLAP)
+        people = {}
+        watermark = since
+        for user_id, username, rating, count, updated in stats.values_list(
+            "user_id", "username", "avg_rating", "review_count", "updated_at"
+        ):
+            people[user_id] = _Freelancer(user_id, username, rating, count)
+            watermark = updated if watermark is None else max(watermark, updated)
+        if people:
+            skills = UserSkill.objects.using(DEFAULT_DB_ALIAS)
+            if since is not None:
+                skills = skills.filter(user_id__in=list(people))
+            for user_id, skill_id in skills.values_list("user_id", "skill_id"):
+                person = people.get(user_id)
+                if person is not None:
+                    person.bits |= 1 << skill_id
+        return people, watermark
+
+    def _apply(self, loaded, rebuild):
+        people, watermark = loaded
+        with self._lock:
+            if rebuild:
+                self._people, self._by_skill = {}, {}
+            for user_id, person in people.items():
+                old = self._people.get(user_id)
+                if old is not None:
+                    for skill_id in _skill_ids(old.bits):
+                        self._by_skill.get(skill_id, set()).discard(user_id)
+                self._people[user_id] = person
+                for skill_id in _skill_ids(person.bits):
+                    self._by_skill.setdefault(skill_id, set()).add(user_id)
+            self._watermark = watermark
+
+    def top(self, skill_ids, k=10, exclude=()):
+        """Best ``k`` freelancers for a project needing ``skill_ids``, as Suggestions."""
+        self.refresh()
+        skill_ids = list(skill_ids)
+        if not skill_ids:
+            return []
+        project_bits = 0
+        for skill_id in skill_ids:
+            project_bits |= 1 << skill_id
+        with self._lock:
+            candidates = set()
+            for skill_id in skill_ids:
+                candidates |= self._by_skill.get(skill_id, set())
+            candidates.difference_update(exclude)
+            people = [self._people[uid] for uid in candidates]
+
+        w_overlap, w_rating = SUGGEST_WEIGHTS
+        needed = len(skill_ids)
+
+        def score(person):
+            overlap = (person.bits & project_bits).bit_count() / needed
+            return w_overlap * overlap + w_rating * person.avg_rating / 5
+
+        best = heapq.nlargest(k, people, key=lambda p: (score(p), p.review_count, -p.user_id))
+        matched = skill_registry.names_for({p.user_id: _skill_ids(p.bits & project_bits) for p in best})
+        return [
+            Suggestion(p.user_id, p.username, p.avg_rating, p.review_count, matched[p.user_id], round(score(p), 4))
+            for p in best
+        ]
+
+
+freelancer_index = FreelancerIndex()
+
+
+def freelancers_for_project(project, k=10):
+    """Suggested freelancers for ``project``, leaving out those who already bid."""
+    k = max(1, min(k, MAX_K))
+    skill_ids = ProjectSkill.objects.filter(project_id=project.pk).values_list("skill_id", flat=True)
+    bidders = Proposal.objects.filter(project_id=project.pk).values_list("freelancer_id", flat=True)
+    return freelancer_index.top(skill_ids, k, exclude=set(bidders))
@@ -0,0 +1,111 @@
+"""Read replicas: reads go to ``settings.DATABASE_REPLICAS``, writes to ``default``.
+
+Replicas lag the primary, so a user who has just written something must
+not read from one straight away. PrimaryStickinessMiddleware handles that:
+
+- within a request, the first write pins every later query to the primary;
+- a request that wrote records a deadline in the session, and the user's
+  requests go to the primary until REPLICA_STICKY_SECONDS have passed.
+
+Reads also stay on the primary inside a transaction (so they see its own
+writes and hold its locks), and for the tables listed in PRIMARY_ONLY,
+which background workers read and change concurrently. Each request reads
+from one replica throughout, so a page never mixes two replicas' lag.
+Outside requests (management commands, job workers) each read picks a
+replica at random.
+
+Anything cached under a cache generation (core.cache) must be read from the
+primary: after a write moves the generation, a lagging replica would put the
+old rows under the new key. Caches fill with ``pin_primary()`` and check
+``on_primary()`` before storing.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_ONLY = {"sessions.session", "core.job", "core.blob"}
+SESSION_KEY = "_primary_until"
+
+_state = ContextVar("replica_routing", default=None)
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+
+def replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+def pin_primary():
+    """Send the rest of this request's queries to the primary."""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def on_primary():
+    """Whether this request's reads go to the primary, so what it rendered may be cached."""
+    if not replicas():
+        return True
+    state = _state.get()
+    return state is not None and state.pinned
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or model._meta.label_lower in PRIMARY_ONLY:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        if state is None:
+            return random.choice(aliases)
+        if state.pinned:
+            return DEFAULT_DB_ALIAS
+        if state.replica not in aliases:
+            state.replica = random.choice(aliases)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        allowed = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in allowed and obj2._state.db in allowed:
+            return True
+        return None
+
+
+class PrimaryStickinessMiddleware:
+    """Keep a user on the primary for a while after they write. Put it after SessionMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+        session = getattr(request, "session", None)
+        pinned = bool(session is not None and session.get(SESSION_KEY, 0) > time.time())
+        state = _RequestState(pinned)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and session is not None:
+            window = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+            session[SESSION_KEY] = time.time() + window
+        return response
@@ -0,0 +1,136 @@
+"""Search documents for projects and freelancers.
+
+Project search text lives in ``project_search`` (ProjectSearchDocument).
+MySQL serves it from a FULLTEXT index in natural language mode; SQLite, used
+for local runs and tests, from an FTS5 table ranked with bm25. Both paths are
+filtered by status and skill in the same statement and return ids ordered
+by relevance.
+
+Freelancers get a ``freelancer_stats`` row (FreelancerStats) holding their
+rating aggregate and normalized skills, so browsing never re-aggregates the
+review history.
+"""
+import re
+
+from django.db import NotSupportedError, connections, router, transaction
+
+from .models import FreelancerStats, ProjectSearchDocument, ProjectSkill, UserSkill
+from .skills import registry as skill_registry
+
+MAX_TERMS = 10
+
+# Column weights for bm25 (title, description, skills_text).
+SQLITE_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def search_terms(query):
+    return re.findall(r"\w+", (query or "").lower())[:MAX_TERMS]
+
+
+def index_project(project, skill_names=None):
+    """Create or refresh the search document for ``project``."""
+    if skill_names is None:
+        skill_names = skill_registry.names(
+            ProjectSkill.objects.filter(project=project).values_list("skill_id", flat=True)
+        )
+    ProjectSearchDocument.objects.update_or_create(
+        project_id=project.pk,
+        defaults={
+            "title": project.title,
+            "description": project.description,
+            "skills_text": " ".join(skill_names),
+        },
+    )
+
+
+def search_projects(query, skill=None, status=None, limit=20, offset=0):
+    """Return ``[(project_id, score), ...]`` best match first.
+
+    ``skill`` is a skill name (case-insensitive); an unknown skill matches
+    nothing. ``status`` is a Project status value.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    filters, params = [], []
+    if status:
+        filters.append("p.status = %s")
+        params.append(status)
+    if skill:
+        skill_id = skill_registry.id_for(skill)
+        if skill_id is None:
+            return []
+        filters.append(
+            "EXISTS (SELECT 1 FROM project_skills ps WHERE ps.project_id = p.id AND ps.skill_id = %s)"
+        )
+        params.append(skill_id)
+    where = "".join(f" AND {f}" for f in filters)
+
+    # Raw SQL bypasses the router; ask it where a search read belongs.
+    db = connections[router.db_for_read(ProjectSearchDocument)]
+    vendor = db.vendor
+    if vendor == "mysql":
+        match = "MATCH(s.title, s.description, s.skills_text) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        sql = (
+            f"SELECT p.id, {match} AS score FROM project_search s "
+            f"JOIN projects p ON p.id = s.project_id "
+            f"WHERE {match}{where} "
+            f"ORDER BY score DESC, p.created_at DESC LIMIT %s OFFSET %s"
+        )
+        text = " ".join(terms)
+        params = [text, text, *params, limit, offset]
+    elif vendor == "sqlite":
+        weights = ", ".join(str(w) for w in SQLITE_WEIGHTS)
+        sql = (
+            f"SELECT p.id, -bm25(project_search_fts, {weights}) AS score FROM project_search_fts "
+            f"JOIN projects p ON p.id = project_search_fts.rowid "
+            f"WHERE project_search_fts MATCH %s{where} "
+            f"ORDER BY score DESC, p.created_at DESC LIMIT %s OFFSET %s"
+        )
+        # Quote each term so user input can never be read as FTS5 syntax.
+        text = " OR ".join(f'"{t}"' for t in terms)
+        params = [text, *params, limit, offset]
+    else:
+        raise NotSupportedError(f"Project search is not implemented for {vendor}.")
+
+    with db.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def index_freelancer(user):
+    """Create or refresh the stats row for ``user``; drop it for non-freelancers."""
+    if not user.is_freelancer:
+        FreelancerStats.objects.filter(user_id=user.pk).delete()
+        return None
+    skill_names = skill_registry.names(
+        UserSkill.objects.filter(user_id=user.pk).values_list("skill_id", flat=True)
+    )
+    stats, _ = FreelancerStats.objects.update_or_create(
+        user_id=user.pk,
+        defaults={
+            "username": user.username,
+            "location": user.location,
+            "skills_text": " ".join(n.lower() for n in skill_names),
+        },
+    )
+    return stats
+
+
+@transaction.atomic
+def record_review(review):
+    """Fold a newly created review into the freelancer's rating aggregate."""
+    freelancer = review.proposal.freelancer
+    stats = FreelancerStats.objects.select_for_update().filter(user_id=freelancer.pk).first()
+    if stats is None:
+        stats = index_freelancer(freelancer)
+        if stats is None:
+            return None
+    bucket = f"stars_{review.rating}"
+    stats.review_count += 1
+    stats.rating_total += review.rating
+    stats.avg_rating = stats.rating_total / stats.review_count
+    setattr(stats, bucket, getattr(stats, bucket) + 1)
+    stats.save(update_fields=["review_count", "rating_total", "avg_rating", bucket, "updated_at"])
+    return stats
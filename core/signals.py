@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from . import blobs, cache
+from .models import CustomUser, Message, Project, ProjectSkill, Review, SkillTag, UserSkill
+from .skills import registry as skill_registry
+
+# Which cache generations a write to each model invalidates.
+INVALIDATES = {
+    Project: ("projects",),
+    ProjectSkill: ("projects",),
+    SkillTag: ("skills",),
+    UserSkill: ("users",),
+    CustomUser: ("users",),
+    Review: ("reviews", "users"),
+}
+
+
+def bump_on_commit(*names):
+    # Bump only once the write is visible, otherwise a concurrent request
+    # could cache the old rows under the new generation.
+    transaction.on_commit(lambda: cache.bump(*names))
+
+
+def _on_write(sender, **kwargs):
+    if sender is SkillTag:
+        skill_registry.invalidate()
+    update_fields = kwargs.get("update_fields")
+    if sender is CustomUser and update_fields and set(update_fields) <= {"last_login"}:
+        return
+    bump_on_commit(*INVALIDATES[sender])
+
+
+def _on_m2m_changed(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_on_commit("users" if sender is UserSkill else "projects")
+
+
+def _on_message_saved(sender, instance, created, **kwargs):
+    if created and instance.attachment:
+        blobs.acquire(instance.attachment.name, instance.attachment.size)
+
+
+def _on_message_deleted(sender, instance, **kwargs):
+    if instance.attachment:
+        blobs.release(instance.attachment.name)
+
+
+def connect():
+    for model in INVALIDATES:
+        post_save.connect(_on_write, sender=model, dispatch_uid=f"cache-save-{model.__name__}")
+        post_delete.connect(_on_write, sender=model, dispatch_uid=f"cache-delete-{model.__name__}")
+    for through in (UserSkill, ProjectSkill):
+        m2m_changed.connect(_on_m2m_changed, sender=through, dispatch_uid=f"cache-m2m-{through.__name__}")
+    post_save.connect(_on_message_saved, sender=Message, dispatch_uid="blob-acquire")
+    post_delete.connect(_on_message_deleted, sender=Message, dispatch_uid="blob-release")
@@ -0,0 +1,84 @@
+"""Process-local registry of SkillTag rows.
+
+Skills change rarely but are read by every form, filter and listing. The
+registry loads the whole table once and serves id/name lookups from memory.
+It reloads when a SkillTag is saved or deleted in this process, and when
+the "skills" cache generation moves. The generation lives in the default
+cache, so writes in other processes are only seen when that cache is shared
+between them (file-based, Redis, Memcached); core.checks refuses a
+process-local one outside DEBUG. Reloads read the primary: a replica may not
+have the write that moved the generation yet, and the registry would keep
+its old rows under the new version.
+"""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS
+
+from . import cache
+from .models import SkillTag
+
+
+class SkillRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._stale = True
+        self._by_id = {}
+        self._by_name = {}
+        self._sorted = []
+
+    def invalidate(self):
+        self._stale = True
+
+    def _load(self):
+        version = cache.version_token("skills")
+        if not self._stale and version == self._version:
+            return
+        with self._lock:
+            if not self._stale and version == self._version:
+                return
+            self._stale = False
+            rows = list(SkillTag.objects.using(DEFAULT_DB_ALIAS).order_by("name").values_list("id", "name"))
+            self._by_id = dict(rows)
+            self._by_name = {name.lower(): skill_id for skill_id, name in rows}
+            self._sorted = rows
+            self._version = version
+
+    def choices(self):
+        """``[(id, name), ...]`` sorted by name, as form choices."""
+        self._load()
+        return self._sorted
+
+    def names(self, ids=None):
+        """Sorted names, for all skills or just ``ids``; unknown ids are skipped."""
+        self._load()
+        if ids is None:
+            return [name for _, name in self._sorted]
+        return self._names(ids)
+
+    def names_for(self, ids_by_key):
+        """``{key: sorted names}`` for ``{key: ids}``, checking the version once for all keys."""
+        self._load()
+        return {key: self._names(ids) for key, ids in ids_by_key.items()}
+
+    def _names(self, ids):
+        by_id = self._by_id
+        return sorted(by_id[i] for i in ids if i in by_id)
+
+    def name(self, skill_id):
+        self._load()
+        return self._by_id.get(skill_id)
+
+    def id_for(self, name):
+        """Id of the skill called ``name`` (case-insensitive), or None."""
+        self._load()
+        return self._by_name.get((name or "").strip().lower())
+
+
+registry = SkillRegistry()
+
+
+def skill_choices():
+    # A plain function (not the bound method) so forms can deepcopy their
+    # fields without copying the registry and its lock.
+    return registry.choices()
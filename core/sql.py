@@ -0,0 +1,52 @@
+"""Helpers for reasoning about captured SQL.
+
+``normalize_sql`` reduces a statement to its shape: literals become ``?``,
+IN lists collapse to one placeholder and whitespace is squeezed. Statements
+with the same shape issued many times in one request are the signature of
+an N+1 loop.
+"""
+import re
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_COLUMNS = re.compile(r"^SELECT (?:DISTINCT )?.+? FROM ", re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def repeated_queries(captured, threshold=2):
+    """Group ``CaptureQueriesContext.captured_queries`` by shape.
+
+    Returns ``[(normalized_sql, count, distinct, total_ms), ...]`` for shapes
+    seen at least ``threshold`` times, most frequent first. ``distinct`` is the
+    number of different raw statements; 1 means exact duplicates.
+    """
+    groups = {}
+    for q in captured:
+        key = normalize_sql(q["sql"])
+        count, raw, total = groups.get(key, (0, set(), 0.0))
+        raw.add(q["sql"])
+        groups[key] = (count + 1, raw, total + float(q["time"]) * 1000)
+    repeated = [(sql, n, len(raw), ms) for sql, (n, raw, ms) in groups.items() if n >= threshold]
+    return sorted(repeated, key=lambda r: (-r[1], -r[3]))
+
+
+def describe(captured, threshold=2, width=200):
+    """Human-readable report of repeated statements, for assertion messages."""
+    lines = []
+    for sql, n, distinct, ms in repeated_queries(captured, threshold):
+        kind = "identical" if distinct == 1 else "similar"
+        # Column lists are noise here; keep the FROM/WHERE that identifies the loop.
+        shown = _COLUMNS.sub("SELECT … FROM ", sql)
+        shown = shown if len(shown) <= width else shown[: width - 1] + "…"
+        lines.append(f"  {n:4}x {kind:9} {ms:8.2f} ms  {shown}")
+    return "\n".join(lines) or "  (no repeated statements)"
@@ -0,0 +1,62 @@
+"""Content-addressed storage for message attachments.
+
+An upload is streamed in chunks into a temporary file while it is hashed,
+then moved to ``<upload_to>/ab/cd/<sha256>``. Identical files therefore
+land on the same path and are stored once, and no directory holds more
+than a small share of the files (two levels of 256 shards). Reference
+counting and garbage collection of the stored files live in core.blobs.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+INCOMING_DIR = ".incoming"
+
+
+def digest_of(name):
+    """The hash in a stored name, or None for files saved before hashing."""
+    base = os.path.basename(name or "")
+    if len(base) == 64 and all(c in "0123456789abcdef" for c in base):
+        return base
+    return None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Names come from the content, so an existing file is the same file.
+        return name
+
+    def _save(self, name, content):
+        prefix = os.path.dirname(name)
+        incoming = self.path(os.path.join(prefix, INCOMING_DIR))
+        os.makedirs(incoming, exist_ok=True)
+
+        sha = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in content.chunks():
+                    sha.update(chunk)
+                    out.write(chunk)
+            digest = sha.hexdigest()
+            stored = os.path.join(prefix, digest[:2], digest[2:4], digest).replace(os.sep, "/")
+            path = self.path(stored)
+            if os.path.exists(path):
+                # Already stored; refresh the mtime so gc_blobs leaves it alone.
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # mkstemp creates the file 0600; give it the usual upload mode.
+                os.chmod(tmp, self.file_permissions_mode if self.file_permissions_mode is not None else 0o644)
+                os.replace(tmp, path)  # atomic, so concurrent identical uploads are safe
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return stored
+
+
+attachment_storage = ContentAddressedStorage()
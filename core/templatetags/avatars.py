@@ -0,0 +1,50 @@
+"""``{% avatar %}``: a user's picture at the smallest thumbnail that is sharp enough.
+
+    {% load avatars %}
+    {% avatar profile_user 64 %}
+
+Works with anything carrying ``username``, ``profile_picture`` and
+``picture_variants``: a CustomUser or a listing row. Renders a <picture>
+offering WebP with a JPEG fallback, the original while the thumbnails are
+still being made, and the user's initial when there is no picture.
+"""
+from urllib.parse import urlencode
+
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from core.thumbnails import pick
+
+register = template.Library()
+
+DENSITY = 2  # device pixels per CSS pixel worth serving
+
+
+@register.simple_tag
+def avatar(user, size=48, css_class=""):
+    size = int(size)
+    style = f"width:{size}px;height:{size}px"
+    if not getattr(user, "profile_picture", None):
+        return format_html(
+            '<span class="inline-flex shrink-0 items-center justify-center rounded-full bg-brand-100 '
+            'text-brand-800 font-semibold {}" style="{};font-size:{}px">{}</span>',
+            css_class, style, size // 2, user.username[:1].upper(),
+        )
+    url = reverse("profile_picture", args=[user.username])
+    variants = getattr(user, "picture_variants", None) or {}
+    chosen = pick(variants, size * DENSITY)
+    img = '<img src="{}" alt="{}" width="{}" height="{}" loading="lazy" class="shrink-0 rounded-full object-cover {}" style="{}">'
+    if chosen is None:
+        return format_html(img, url, user.username, size, size, css_class, style)
+    formats = variants[chosen]
+    fallback = "jpeg" if "jpeg" in formats else next(iter(formats))
+    webp = ""
+    if "webp" in formats and fallback != "webp":
+        webp = format_html(
+            '<source srcset="{}?{}" type="image/webp">', url, urlencode({"size": chosen, "format": "webp"})
+        )
+    return format_html(
+        "<picture>{}" + img + "</picture>",
+        webp, f"{url}?{urlencode({'size': chosen, 'format': fallback})}", user.username, size, size, css_class, style,
+    )
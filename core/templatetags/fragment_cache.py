@@ -0,0 +1,58 @@
+"""``{% cachedfragment %}``: per-card template caching keyed on data generations.
+
+    {% load fragment_cache %}
+    {% cachedfragment "project_card" p.id depends="projects,skills" %}
+      ...
+    {% endcachedfragment %}
+
+A fragment rendered from replica rows is shown but not stored (see
+core.routing); anonymous page-cache misses read the primary and fill them.
+"""
+from django import template
+from django.core.cache import cache as default_cache
+
+from core import cache, routing
+
+register = template.Library()
+
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on, depends):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.depends = depends
+
+    def render(self, context):
+        # Look the generations up once per template render, not once per card.
+        tokens = context.render_context.setdefault("cachedfragment_tokens", {})
+        if self.depends not in tokens:
+            tokens[self.depends] = cache.version_token(*self.depends)
+        vary = ":".join(str(v.resolve(context)) for v in self.vary_on)
+        key = f"frag:{self.name.resolve(context)}:{tokens[self.depends]}:{vary}"
+
+        content = default_cache.get(key)
+        cache.record("fragment", content is not None)
+        if content is None:
+            content = self.nodelist.render(context)
+            if routing.on_primary():
+                default_cache.set(key, content, cache.FRAGMENT_TIMEOUT)
+        return content
+
+
+@register.tag
+def cachedfragment(parser, token):
+    bits = token.split_contents()[1:]
+    if not bits:
+        raise template.TemplateSyntaxError("cachedfragment needs a fragment name.")
+    depends = ()
+    if bits[-1].startswith("depends="):
+        names = bits.pop()[len("depends="):].strip("\"'")
+        depends = tuple(n for n in names.split(",") if n)
+        unknown = set(depends) - set(cache.GENERATIONS)
+        if unknown:
+            raise template.TemplateSyntaxError(f"Unknown cache generations: {', '.join(sorted(unknown))}")
+    nodelist = parser.parse(("endcachedfragment",))
+    parser.delete_first_token()
+    name, *vary_on = (parser.compile_filter(b) for b in bits)
+    return CachedFragmentNode(nodelist, name, vary_on, depends)
@@ -1,3 +1,1091 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache as default_cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import benchmarks, blobs, cache, export, importer, jobs, messaging, metrics, recommend, routing, thumbnails
+from .admin import ProjectAdmin
+
+from .listings import PROJECT_FIELDS, load_projects
+from .pagination import encode_cursor
+from .models import (
+    Blob,
+    Conversation,
+    CustomUser,
+    FreelancerStats,
+    Job,
+    Message,
+    Project,
+    ProjectSearchDocument,
+    ProjectSkill,
+    Proposal,
+    Review,
+    SkillTag,
+    UserSkill,
+    conversation_key,
+)
+from .proposals import ACCEPTED, CONFLICT, accept_proposal
+from .search import index_freelancer, index_project, record_review, search_projects
+from .sql import describe
+from .storage import digest_of
+from .views import RECENT_PROPOSALS_ON_DASHBOARD, REVIEW_PAGE_SIZE
+from .skills import SkillRegistry, registry as skill_registry
+
+
+class MessagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ada = CustomUser.objects.create_user("ada")
+        cls.bob = CustomUser.objects.create_user("bob")
+
+    def summary(self):
+        conversation = Conversation.objects.get()
+        return (
+            conversation.message_count, conversation.last_message_preview,
+            conversation.last_sender_id, conversation.last_message_at,
+        )
+
+    def test_sending_keeps_one_summary_row_per_pair(self):
+        messaging.send_message(self.ada, self.bob, "hi")
+        latest = messaging.send_message(self.bob, self.ada, "hello back")
+        # An imported message older than the last one counts but does not become the last.
+        old = Message(sender=self.ada, receiver=self.bob, text="from last year",
+                      timestamp=timezone.now() - timedelta(days=365))
+        messaging.deliver(old)
+        self.assertEqual(self.summary(), (3, "hello back", self.bob.pk, latest.timestamp))
+        for user in (self.ada, self.bob):
+            [conversation] = Conversation.objects.for_user(user)
+            self.assertEqual(conversation.partner_for(user), self.bob if user == self.ada else self.ada)
+
+    def test_backfill_rebuilds_the_summaries_idempotently(self):
+        carol = CustomUser.objects.create_user("carol")
+        now = timezone.now()
+        for i, (sender, receiver) in enumerate([(self.ada, self.bob), (self.bob, self.ada), (carol, self.ada)]):
+            Message.objects.create(sender=sender, receiver=receiver, text=f"m{i}", timestamp=now + timedelta(seconds=i))
+
+        def rows():
+            return sorted(Conversation.objects.values_list(
+                "user_low", "user_high", "message_count", "last_message_preview", "last_sender",
+            ))
+
+        expected = [
+            (self.ada.pk, self.bob.pk, 2, "m1", self.bob.pk),
+            (self.ada.pk, carol.pk, 1, "m2", carol.pk),
+        ]
+        out = StringIO()
+        call_command("backfill_conversations", batch_size=1, stdout=out)
+        self.assertEqual(rows(), expected)
+        call_command("backfill_conversations", stdout=out)
+        self.assertEqual(rows(), expected)
+        self.assertIn("Backfilled 2 conversations.", out.getvalue())
+
+    def test_conversation_key_is_symmetric_and_scopes_the_thread(self):
+        self.assertEqual(conversation_key(self.ada.pk, self.bob.pk), conversation_key(self.bob.pk, self.ada.pk))
+        messaging.send_message(self.ada, self.bob, "to bob")
+        messaging.send_message(self.bob, self.ada, "to ada")
+        messaging.send_message(self.ada, CustomUser.objects.create_user("carol"), "to carol")
+        key = conversation_key(self.ada.pk, self.bob.pk)
+        self.assertEqual(Message.objects.filter(conversation_key=key).count(), 2)
+
+        self.client.force_login(self.ada)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("chat_detail", args=["bob"]))
+        self.assertEqual([m.text for m in response.context["chat_messages"]], ["to bob", "to ada"])
+        [thread] = [q["sql"] for q in ctx.captured_queries if 'FROM "messages"' in q["sql"]]
+        self.assertIn(f'"messages"."conversation_key" = {key}', thread)
+        self.assertNotIn(" OR ", thread)
+
+    def test_polling_returns_only_messages_after_the_given_id(self):
+        first, second, third = (messaging.send_message(self.ada, self.bob, t) for t in ("one", "two", "three"))
+        other = messaging.send_message(self.ada, CustomUser.objects.create_user("carol"), "elsewhere")
+        url = reverse("chat_messages", args=["ada"])
+        self.client.force_login(self.bob)
+
+        data = self.client.get(url, {"after": first.pk}).json()
+        self.assertEqual([m["text"] for m in data["messages"]], ["two", "three"])
+        self.assertEqual(data["last_id"], third.pk)
+        self.assertEqual(self.client.get(url, {"after": third.pk}).json(), {"messages": [], "last_id": third.pk})
+        self.assertEqual(len(self.client.get(url).json()["messages"]), 3)
+
+        for bad in ("abc", "1.5", "-1", str(other.pk), "99999999999999999999999"):
+            with self.subTest(after=bad):
+                self.assertEqual(self.client.get(url, {"after": bad}).status_code, 400)
+
+
+class ListingQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = CustomUser.objects.create_user("acme", is_client=True)
+        cls.skills = [SkillTag.objects.create(name=n) for n in ("Django", "Python", "SQL")]
+
+    def setUp(self):
+        skill_registry.choices()  # load outside the measured requests
+
+    def make_projects(self, n):
+        for i in range(n):
+            project = Project.objects.create(
+                client=self.client_user, title=f"Project {i}", description="…", budget=100
+            )
+            ProjectSkill.objects.bulk_create(
+                [ProjectSkill(project=project, skill=s) for s in self.skills[: i % 3 + 1]]
+            )
+
+    def make_freelancers(self, n):
+        start = CustomUser.objects.filter(is_freelancer=True).count()
+        for i in range(start, start + n):
+            user = CustomUser.objects.create_user(f"dev{i}", is_freelancer=True)
+            UserSkill.objects.bulk_create([UserSkill(user=user, skill=s) for s in self.skills[: i % 3 + 1]])
+            index_freelancer(user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_load_projects_attaches_skill_names(self):
+        self.make_projects(3)
+        with self.assertNumQueries(2):
+            rows = load_projects(Project.objects.order_by("id").values(*PROJECT_FIELDS))
+        self.assertEqual([r.skills for r in rows], [["Django"], ["Django", "Python"], ["Django", "Python", "SQL"]])
+
+    def test_project_list_query_count_is_constant(self):
+        self.make_projects(2)
+        small = self.count_queries(reverse("project_list"))
+        small_api = self.count_queries(reverse("project_list_api"))
+        self.make_projects(15)
+        self.assertEqual(self.count_queries(reverse("project_list")), small)
+        self.assertEqual(self.count_queries(reverse("project_list_api")), small_api)
+
+    def test_browse_freelancers_query_count_is_constant(self):
+        self.make_freelancers(3)
+        small = self.count_queries(reverse("browse_freelancers"))
+        searched = self.count_queries(reverse("browse_freelancers") + "?q=sql")
+        self.make_freelancers(15)
+        self.assertEqual(self.count_queries(reverse("browse_freelancers")), small)
+        self.assertEqual(self.count_queries(reverse("browse_freelancers") + "?q=sql"), searched)
+
+    def test_skill_version_is_checked_once_per_listing(self):
+        urls = [reverse("project_list_api"), reverse("browse_freelancers"), reverse("project_list")]
+        self.client.force_login(self.client_user)  # past the page cache
+
+        def lookups():
+            counts = {}
+            for url in urls:
+                with patch.object(cache, "generations", wraps=cache.generations) as spy:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                counts[url] = spy.call_count
+            return counts
+
+        self.make_projects(2)
+        self.make_freelancers(2)
+        small = lookups()
+        self.make_projects(15)
+        self.make_freelancers(15)
+        self.assertEqual(lookups(), small)
+
+    def test_tampered_cursors_get_the_first_page(self):
+        self.make_projects(2)
+        self.make_freelancers(2)
+        tampered = [
+            encode_cursor(["x", 1]),
+            encode_cursor([None, None]),
+            encode_cursor([{"a": 1}, 1]),
+            encode_cursor(["2024-01-01T00:00:00", 10 ** 30]),
+            encode_cursor([1]),
+            "not base64!",
+        ]
+        self.client.force_login(self.client_user)
+        for cursor in tampered:
+            for url in (
+                reverse("project_list_api"),
+                reverse("browse_freelancers"),
+                reverse("dashboard"),
+                reverse("chat_detail", args=["dev0"]),
+                reverse("view_profile", args=["dev0"]),
+            ):
+                with self.subTest(url=url, cursor=cursor):
+                    param = "before" if "chat" in url else "cursor"
+                    self.assertEqual(self.client.get(url, {param: cursor}).status_code, 200)
+        api = self.client.get(reverse("project_list_api"), {"cursor": tampered[0]}).json()
+        self.assertEqual(len(api["results"]), 2)
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = CustomUser.objects.create_user("acme", is_client=True)
+
+    def setUp(self):
+        default_cache.clear()
+
+    def create_project(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Project.objects.create(client=self.client_user, title=title, description="…", budget=10)
+
+    def test_anonymous_page_is_cached_until_projects_change(self):
+        self.create_project("First")
+        url = reverse("project_list")
+        self.assertContains(self.client.get(url), "First")
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), "First")
+
+        self.create_project("Second")
+        self.assertContains(self.client.get(url), "Second")
+        self.assertEqual(cache.stats()["page:hit"], 1)
+        self.assertEqual(cache.stats()["page:miss"], 2)
+
+    def test_pages_with_flash_messages_are_not_cached(self):
+        from django.contrib import messages
+        from django.contrib.auth.models import AnonymousUser
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test import RequestFactory
+
+        from .views import home
+
+        request = RequestFactory().get(reverse("home"))
+        request.user, request.session = AnonymousUser(), SessionStore()
+        request._messages = FallbackStorage(request)
+        messages.info(request, "You have been logged out.")
+        self.assertContains(home(request), "You have been logged out.")
+
+        self.assertNotContains(self.client.get(reverse("home")), "You have been logged out.")
+        self.assertEqual(cache.stats()["page:hit"], 0)
+
+    def test_logged_in_users_get_cached_fragments(self):
+        project = self.create_project("Card")
+        self.client.force_login(self.client_user)
+        url = reverse("project_list")
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(cache.stats()["fragment:hit"], 1)
+        self.assertEqual(cache.stats()["page:hit"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.title = "Renamed"
+            project.save()
+        self.assertContains(self.client.get(url), "Renamed")
+
+    def test_login_does_not_invalidate_user_pages(self):
+        before = cache.generations("users")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(self.client_user)
+        self.assertEqual(cache.generations("users"), before)
+
+    @override_settings(DEBUG=False)
+    def test_production_requires_a_shared_cache(self):
+        from .checks import shared_cache
+
+        self.assertEqual([e.id for e in shared_cache(None)], ["core.E001"])
+        with tempfile.TemporaryDirectory() as path:
+            backend = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": path}}
+            with self.settings(CACHES=backend):
+                self.assertEqual(shared_cache(None), [])
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as path:
+            backend = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": path}}
+            with self.settings(CACHES=backend):
+                self.create_project("On disk")
+                url = reverse("project_list")
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    self.assertContains(self.client.get(url), "On disk")
+
+
+# Per-scenario ceilings: (queries, total SQL milliseconds). Scenario names come
+# from core.benchmarks; every scenario must have an entry. Query counts are
+# exact costs on the seeded dataset and should only move down. SQL time is
+# measured on the test database, so its ceilings are deliberately loose; they
+# exist to catch a missing index or an accidental scan, not to benchmark.
+VIEW_BUDGETS = {
+    "root": (0, 10),
+    "home": (0, 10),
+    "register": (0, 10),
+    "login": (0, 10),
+    "logout": (4, 25),
+    "dashboard:client": (4, 50),
+    "dashboard:freelancer": (8, 50),
+    "recommended_projects_api": (6, 25),
+    "post_project:form": (2, 25),
+    "post_project:submit": (16, 100),
+    "import_projects": (2, 25),
+    "project_list": (2, 25),
+    "project_list:user": (4, 25),
+    "project_list:skill": (4, 50),
+    "project_list:search": (5, 50),
+    "project_list_api": (2, 25),
+    "project_search_api": (3, 50),
+    "project_detail": (6, 25),
+    "submit_proposal": (3, 25),
+    "view_proposals": (5, 50),
+    "view_proposals:fragment": (5, 50),
+    "inbox": (4, 50),
+    "chat_detail": (4, 50),
+    "chat_messages": (4, 50),
+    "chat_detail:send": (11, 100),
+    "update_proposal_status": (15, 100),
+    "submit_review": (9, 50),
+    "view_profile": (6, 50),
+    "edit_profile": (4, 25),
+    "browse_freelancers": (2, 25),
+    "browse_freelancers:search": (4, 50),
+    "metrics": (0, 10),
+    "export:projects": (2, 100),
+    "export:messages": (1, 100),
+    "message_attachment": (3, 25),
+    "profile_picture": (1, 25),
+}
+
+
+class ReviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user("acme", is_client=True)
+        cls.dev = CustomUser.objects.create_user("dev", is_freelancer=True)
+        index_freelancer(cls.dev)
+
+    def review(self, rating, created_at=None):
+        project = Project.objects.create(client=self.owner, title="Job", description="…", budget=10)
+        proposal = Proposal.objects.create(project=project, freelancer=self.dev, message="…", proposed_price=10)
+        review = Review.objects.create(proposal=proposal, rating=rating, comment="ok", created_at=created_at)
+        record_review(review)
+        return review
+
+    def test_record_review_updates_the_histogram(self):
+        for rating in (5, 5, 4, 1):
+            self.review(rating)
+        stats = FreelancerStats.objects.get(user=self.dev)
+        self.assertEqual((stats.review_count, stats.avg_rating), (4, 3.75))
+        self.assertEqual(stats.histogram(), [(5, 2, 50), (4, 1, 25), (3, 0, 0), (2, 0, 0), (1, 1, 25)])
+
+    def test_review_pages_are_stable_while_reviews_arrive(self):
+        # One shared timestamp, so only the id tiebreak orders the pages.
+        stamp = timezone.now() - timedelta(days=1)
+        expected = [self.review(3, stamp).pk for _ in range(2 * REVIEW_PAGE_SIZE + 1)][::-1]
+        url = reverse("view_profile", args=["dev"])
+        self.client.force_login(self.owner)
+        seen, params = [], {}
+        while True:
+            response = self.client.get(url, params)
+            seen += [r.pk for r in response.context["reviews"]]
+            if not response.context["older_cursor"]:
+                break
+            params = {"cursor": response.context["older_cursor"]}
+            self.review(5)  # newer than every page being walked
+        self.assertEqual(seen, expected)
+
+
+class ClientDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user("agency", is_client=True)
+        cls.freelancers = [CustomUser.objects.create_user(f"bidder{i}", is_freelancer=True) for i in range(6)]
+
+    def add_project(self, statuses):
+        project = Project.objects.create(client=self.owner, title="P", description="…", budget=10)
+        Proposal.objects.bulk_create([
+            Proposal(project=project, freelancer=f, message="…", proposed_price=10, status=st)
+            for f, st in zip(self.freelancers, statuses)
+        ])
+        return project
+
+    def test_counts_come_from_one_grouped_query(self):
+        self.client.force_login(self.owner)
+        first = self.add_project(["pending", "pending", "rejected", "accepted"])
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse("dashboard"))
+        for _ in range(5):
+            self.add_project(["pending"] * 6)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(len(small), len(large))
+        counts = {p["id"]: (p["pending"], p["accepted"], p["rejected"]) for p in response.context["projects"]}
+        self.assertEqual(counts[first.pk], (2, 1, 1))
+        self.assertEqual(len(response.context["proposals"]), RECENT_PROPOSALS_ON_DASHBOARD)
+
+    def test_proposal_fragment_pages(self):
+        self.client.force_login(self.owner)
+        project = self.add_project(["pending"] * 6)
+        url = reverse("view_proposals", args=[project.pk])
+        with patch("core.views.PROPOSAL_PAGE_SIZE", 4):
+            first = self.client.get(url, headers={"x-requested-with": "XMLHttpRequest"})
+            second = self.client.get(f"{url}?cursor={first.context['next_cursor']}",
+                                     headers={"x-requested-with": "XMLHttpRequest"})
+        self.assertTemplateNotUsed(first, "core/base.html")
+        self.assertEqual(len(first.context["proposals"]) + len(second.context["proposals"]), 6)
+        self.assertIsNone(second.context["next_cursor"])
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_superuser("support", password="pw")
+        owner = CustomUser.objects.create_user("owner", is_client=True)
+        for i in range(7):
+            index_project(Project.objects.create(client=owner, title=f"Shop {i}", description="…", budget=10))
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_changelists_render(self):
+        for model in ("project", "proposal", "message", "review", "skilltag"):
+            with self.subTest(model):
+                self.assertEqual(self.client.get(reverse(f"admin:core_{model}_changelist")).status_code, 200)
+
+    def test_pages_follow_the_cursor(self):
+        url = reverse("admin:core_project_changelist")
+        query = ""
+        seen, counts = [], set()
+        with patch.object(ProjectAdmin, "list_per_page", 3):
+            while query is not None:
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(url + query)
+                seen += [p.pk for p in response.context["cl"].result_list]
+                counts.add(len(ctx))
+                self.assertFalse(any("OFFSET" in q["sql"] for q in ctx))
+                query = response.context["older_url"]
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(seen, list(Project.objects.order_by("-created_at", "-id").values_list("id", flat=True)))
+
+    def test_staff_get_only_the_scoped_permissions(self):
+        sender = CustomUser.objects.create_user("sender")
+        message = Message.objects.create(sender=sender, receiver=self.staff, text="private")
+        project = Project.objects.first()
+        self.assertEqual(self.client.get(reverse("admin:core_message_change", args=[message.pk])).status_code, 200)
+        for url in (
+            reverse("admin:core_message_change", args=[message.pk]),
+            reverse("admin:core_message_delete", args=[message.pk]),
+            reverse("admin:core_project_delete", args=[project.pk]),
+            reverse("admin:core_review_add"),
+        ):
+            with self.subTest(url):
+                self.assertEqual(self.client.post(url, {"text": "edited", "post": "yes"}).status_code, 403)
+        message.refresh_from_db()
+        self.assertEqual(message.text, "private")
+        self.assertTrue(self.staff.has_perm("core.change_project"))
+        self.assertFalse(CustomUser(username="x").has_perm("core.view_project"))
+
+    def test_project_search_uses_full_text_index(self):
+        response = self.client.get(reverse("admin:core_project_changelist"), {"q": "shop"})
+        self.assertEqual(len(response.context["cl"].result_list), 7)
+
+
+class AttachmentStorageTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.alice = CustomUser.objects.create_user("alice")
+        self.bob = CustomUser.objects.create_user("bob")
+
+    def send(self, name, data):
+        return Message.objects.create(sender=self.alice, receiver=self.bob, attachment=SimpleUploadedFile(name, data))
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.send("contract.pdf", b"%PDF same bytes")
+        second = self.send("contract-v2.pdf", b"%PDF same bytes")
+        other = self.send("other.pdf", b"%PDF other bytes")
+        self.assertEqual(first.attachment.name, second.attachment.name)
+        self.assertNotEqual(first.attachment.name, other.attachment.name)
+        self.assertRegex(first.attachment.name, r"^attachments/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}$")
+        self.assertEqual((first.attachment_name, second.attachment_name), ("contract.pdf", "contract-v2.pdf"))
+        self.assertEqual(Blob.objects.get(pk=digest_of(first.attachment.name)).refcount, 2)
+
+    def test_unreferenced_blobs_are_collected_after_the_grace_period(self):
+        first = self.send("a.pdf", b"shared")
+        second = self.send("b.pdf", b"shared")
+        path = first.attachment.path
+        first.delete()
+        self.assertEqual(blobs.collect(grace=60), (0, 0))
+        second.delete()
+        self.assertEqual(blobs.collect(grace=60), (0, 0))  # still within the grace period
+        past = timezone.now() - timedelta(hours=1)
+        Blob.objects.update(released_at=past)
+        os.utime(path, (past.timestamp(), past.timestamp()))
+        self.assertEqual(blobs.collect(grace=60), (1, 6))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(Blob.objects.exists())
+
+
+class AttachmentServingTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.alice = CustomUser.objects.create_user("alice")
+        self.bob = CustomUser.objects.create_user("bob")
+        self.message = Message.objects.create(
+            sender=self.alice, receiver=self.bob, attachment=SimpleUploadedFile("notes.txt", b"0123456789"),
+        )
+        self.url = reverse("message_attachment", args=[self.message.pk])
+
+    def test_only_the_two_parties_can_download(self):
+        self.client.force_login(CustomUser.objects.create_user("mallory"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.bob)
+        response = self.client.get(self.url)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["ETag"], f'"{digest_of(self.message.attachment.name)}"')
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="notes.txt"')
+
+    def test_conditional_and_range_requests(self):
+        self.client.force_login(self.alice)
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, headers={"if-none-match": etag}).status_code, 304)
+
+        response = self.client.get(self.url, headers={"range": "bytes=2-5"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        suffix = self.client.get(self.url, headers={"range": "bytes=-3"})
+        self.assertEqual(b"".join(suffix.streaming_content), b"789")
+        self.assertEqual(self.client.get(self.url, headers={"range": "bytes=10-"}).status_code, 416)
+        stale = self.client.get(self.url, headers={"range": "bytes=2-5", "if-range": '"other"'})
+        self.assertEqual(stale.status_code, 200)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT="/protected-media/")
+    def test_hands_off_to_the_front_end(self):
+        self.client.force_login(self.alice)
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.message.attachment.name}")
+        self.assertEqual(response.content, b"")
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def flaky(payload):
+            self.calls.append(payload)
+            raise RuntimeError("downstream unavailable")
+
+        def tag(payload):
+            self.calls.append(payload)
+            SkillTag.objects.create(name=payload["name"])
+
+        self.enterContext(patch.dict(jobs.HANDLERS, {"test.flaky": flaky, "test.tag": tag}))
+
+    def make_due(self):
+        Job.objects.update(run_after=timezone.now())
+
+    def test_failures_are_retried_with_backoff_then_marked_failed(self):
+        with self.assertLogs("core.jobs", "WARNING"):
+            jobs.enqueue("test.flaky", {"n": 1}, max_attempts=3)
+            self.assertEqual(jobs.run_pending(), {"retry": 1})
+            job = Job.objects.get()
+            self.assertEqual((job.status, job.attempts), ("pending", 1))
+            self.assertIn("downstream unavailable", job.last_error)
+            self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), jobs.BACKOFF_BASE, delta=5)
+            self.assertEqual(jobs.run_pending(), {})  # not due yet
+
+            self.make_due()
+            jobs.run_pending()
+            job.refresh_from_db()
+            self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), 2 * jobs.BACKOFF_BASE, delta=5)
+
+            self.make_due()
+            self.assertEqual(jobs.run_pending(), {"failed": 1})
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, len(self.calls)), ("failed", 3, 3))
+            self.make_due()
+            self.assertEqual(jobs.run_pending(), {})
+
+    def test_a_requeued_job_is_finished_only_by_its_new_worker(self):
+        with self.assertLogs("core.jobs", "WARNING"):
+            jobs.enqueue("test.tag", {"name": "Rust"})
+            [stale] = jobs.claim()
+            # The first worker stalls past its lease and the job is handed out again.
+            self.assertEqual(jobs.requeue_stale(now=timezone.now() + jobs.LEASE + timedelta(minutes=1)), 1)
+            [fresh] = jobs.claim()
+            self.assertEqual(jobs.run(stale), "lost")
+            self.assertFalse(SkillTag.objects.filter(name="Rust").exists())  # rolled back
+            self.assertEqual(jobs.run(fresh), "done")
+            job = Job.objects.get()
+            self.assertEqual((job.status, job.attempts), ("done", 2))
+            self.assertEqual(SkillTag.objects.filter(name="Rust").count(), 1)
+
+    def test_enqueue_with_the_same_key_is_a_no_op(self):
+        with transaction.atomic():
+            jobs.enqueue("test.tag", {"name": "Go"}, key="tag:go")
+            jobs.enqueue("test.tag", {"name": "Go"}, key="tag:go")
+            self.assertEqual(CustomUser.objects.count(), 0)  # the transaction is still usable
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(jobs.run_pending(), {"done": 1})
+
+    def test_staged_handlers_write_inside_the_job_transaction_only(self):
+        depth = {}
+
+        @jobs.handler("test.staged", staged=True)
+        def staged(payload):
+            depth["work"] = len(connection.atomic_blocks)
+
+            def write():
+                depth["write"] = len(connection.atomic_blocks)
+                SkillTag.objects.create(name=payload["name"])
+
+            return write
+
+        jobs.enqueue("test.staged", {"name": "Elixir"})
+        self.assertEqual(jobs.run_pending(), {"done": 1})
+        self.assertEqual(depth["write"], depth["work"] + 1)
+        self.assertTrue(SkillTag.objects.filter(name="Elixir").exists())
+
+
+class ProjectIndexTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user("acme", is_client=True)
+        self.skill = SkillTag.objects.create(name="Elixir")
+        self.index = recommend.ProjectIndex()
+        self.index.refresh(force=True)
+
+    def project(self, title):
+        project = Project.objects.create(client=self.owner, title=title, description="…", budget=10)
+        ProjectSkill.objects.create(project=project, skill=self.skill)
+        return project
+
+    def refresh(self):
+        self.index._checked = 0.0  # as if CHECK_INTERVAL had passed
+        self.index.refresh()
+        return [pid for pid, _ in self.index.top([self.skill.pk])]
+
+    def test_refresh_reads_only_changed_projects(self):
+        late = self.project("Committed late")
+        early = self.project("Committed first")
+        # `late` was stamped before the last refresh but its transaction committed after it.
+        Project.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(sorted(self.refresh()), sorted([late.pk, early.pk]))
+
+        proposal = Proposal.objects.create(
+            project=early, freelancer=CustomUser.objects.create_user("dev", is_freelancer=True),
+            message="…", proposed_price=10,
+        )
+        accept_proposal(proposal)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.refresh(), [late.pk])
+        scans = [q["sql"] for q in ctx.captured_queries if 'FROM "projects"' in q["sql"]]
+        self.assertEqual(len(scans), 1)
+        self.assertIn('WHERE "projects"."updated_at" >=', scans[0])  # not every open project
+
+    def test_a_reviewed_project_leaves_the_recommendations(self):
+        project = self.project("Reviewed")
+        viewer = CustomUser.objects.create_user("viewer", is_freelancer=True)
+        UserSkill.objects.create(user=viewer, skill=self.skill)
+        self.assertEqual(self.refresh(), [project.pk])
+        # Past the watermark's overlap, so only a fresh updated_at gets it re-read.
+        Project.objects.filter(pk=project.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.refresh()
+        proposal = Proposal.objects.create(
+            project=project, freelancer=CustomUser.objects.create_user("dev", is_freelancer=True),
+            message="…", proposed_price=10,
+        )
+        self.client.force_login(self.owner)
+        self.client.post(reverse("submit_review", args=[proposal.pk]), {"rating": 5, "comment": "Done"})
+        with patch.object(recommend, "index", self.index):
+            self.assertEqual(recommend.for_freelancer(viewer), [])  # before the index notices
+        self.assertEqual(self.refresh(), [])
+
+
+class MetricsTests(TestCase):
+    def test_endpoint_needs_the_configured_token(self):
+        url = reverse("metrics")
+        with self.settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get(url).status_code, 403)
+        with self.settings(METRICS_TOKEN="scrape"):
+            self.assertEqual(self.client.get(url).status_code, 403)
+            response = self.client.get(url, headers={"authorization": "Bearer scrape"})
+            self.assertContains(response, "http_request_duration_seconds")
+
+    def test_exited_threads_are_folded_into_the_totals(self):
+        metrics.reset()
+        workers = [
+            threading.Thread(target=metrics.observe, args=("probe", 0.01, 200, metrics._Request()))
+            for _ in range(5)
+        ]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        self.assertEqual(metrics._totals()["probe"].requests, 5)
+        self.assertFalse(any(t in metrics._shards for t in workers))
+        self.assertIn('http_request_duration_seconds_count{view="probe"} 5', metrics.render())
+
+
+class BackfillMigrationTests(TestCase):
+    """The data migrations that fill derived tables for rows that predate them."""
+
+    def migrate(self, name, function):
+        from django.apps import apps
+
+        module = import_module(f"core.migrations.{name}")
+        getattr(module, function)(apps, SimpleNamespace(connection=connection))
+
+    def test_projects_get_search_documents(self):
+        client = CustomUser.objects.create_user("acme", is_client=True)
+        project = Project.objects.create(client=client, title="Legacy shop", description="…", budget=10)
+        for name in ("Python", "Django"):
+            ProjectSkill.objects.create(project=project, skill=SkillTag.objects.create(name=name))
+        index_project(project)
+        indexed = ProjectSearchDocument.objects.get(project=project).skills_text
+        ProjectSearchDocument.objects.all().delete()
+        self.migrate("0022_backfill_project_search", "backfill_project_search")
+        self.assertEqual(ProjectSearchDocument.objects.get(project=project).skills_text, indexed)
+        self.assertEqual(indexed, "Django Python")
+        self.assertEqual([pid for pid, _ in search_projects("legacy")], [project.pk])
+
+    def test_freelancers_get_stats_rows(self):
+        client = CustomUser.objects.create_user("acme", is_client=True)
+        dev = CustomUser.objects.create_user("dev", is_freelancer=True, location="Oslo")
+        for name in ("SQL", "Django"):
+            UserSkill.objects.create(user=dev, skill=SkillTag.objects.create(name=name))
+        project = Project.objects.create(client=client, title="Old", description="…", budget=10)
+        for rating in (5, 4):
+            proposal = Proposal.objects.create(project=project, freelancer=dev, message="…", proposed_price=10)
+            Review.objects.create(proposal=proposal, rating=rating)
+        FreelancerStats.objects.all().delete()
+        self.migrate("0023_backfill_freelancer_stats", "backfill_freelancer_stats")
+        stats = FreelancerStats.objects.get(user=dev)
+        self.assertEqual((stats.location, stats.skills_text, stats.review_count), ("Oslo", "django sql", 2))
+        self.assertEqual(stats.skills_text, index_freelancer(dev).skills_text)
+        self.assertEqual((stats.avg_rating, stats.stars_5, stats.stars_4), (4.5, 1, 1))
+        self.assertContains(self.client.get(reverse("browse_freelancers")), "Oslo")
+
+
+def jpeg(size, color="navy"):
+    from PIL import Image
+
+    buf = BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG")
+    return SimpleUploadedFile("me.jpg", buf.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(THUMBNAIL_WORKERS=1)
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.user = CustomUser.objects.create_user("ada", is_freelancer=True)
+        self.client.force_login(self.user)
+        self.storage = CustomUser._meta.get_field("profile_picture").storage
+
+    def upload(self, picture):
+        url = reverse("edit_profile", args=["ada"])
+        self.client.post(url, {"name": "Ada", "profile_picture": picture})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.picture_variants, {})  # made later, by the job
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.run_pending(kinds=["thumbnails"])
+        self.user.refresh_from_db()
+        return self.user.picture_variants
+
+    def test_upload_generates_variants_off_the_request(self):
+        variants = self.upload(jpeg((900, 600)))
+        self.assertEqual(sorted(variants, key=int), [str(s) for s in thumbnails.SIZES])
+        from PIL import Image
+
+        with Image.open(self.storage.path(variants["128"]["webp"])) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ("WEBP", (128, 128)))
+
+        url = reverse("profile_picture", args=["ada"])
+        response = self.client.get(url, {"size": "64", "format": "jpeg"})
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertLess(len(b"".join(response.streaming_content)), self.user.profile_picture.size)
+        # Unknown sizes get the original.
+        original = self.client.get(url, {"size": "9999", "format": "webp"})
+        self.assertEqual(len(b"".join(original.streaming_content)), self.user.profile_picture.size)
+
+        # 48 CSS pixels at 2x density: the 128 variant, WebP with a JPEG fallback.
+        page = self.client.get(reverse("view_profile", args=["ada"])).content.decode()
+        self.assertIn(f"{url}?size=128&amp;format=webp", page)
+        self.assertIn(f"{url}?size=128&amp;format=jpeg", page)
+
+    def test_replacing_the_picture_removes_old_variants(self):
+        old = self.upload(jpeg((300, 300)))
+        new = self.upload(jpeg((300, 300), "olive"))
+        self.assertNotEqual(old["64"]["jpeg"], new["64"]["jpeg"])
+        self.assertFalse(self.storage.exists(old["64"]["jpeg"]))
+        self.assertTrue(self.storage.exists(new["64"]["jpeg"]))
+
+    def test_backfill_command(self):
+        self.user.profile_picture = jpeg((200, 200))
+        self.user.save()
+        out = StringIO()
+        call_command("generate_thumbnails", batch_size=1, stdout=out)
+        self.user.refresh_from_db()
+        self.assertEqual(len(self.user.picture_variants), len(thumbnails.SIZES))
+        self.assertIn("Generated thumbnails for 1 pictures, 0 failed", out.getvalue())
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Generated thumbnails for 0 pictures", out.getvalue())
+
+
+@override_settings(EXPORT_TOKEN="budget-tests", METRICS_TOKEN="budget-tests")
+class ViewBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # seed_data writes attachments and profile pictures.
+        media = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media.cleanup)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media.name))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "seed_data", users=60, skills=30, projects=150, proposals=500, messages=800,
+            batch_size=200, stdout=StringIO(),
+        )
+
+    def test_every_route_has_a_budget(self):
+        scenarios = benchmarks.scenarios(benchmarks.fixture())
+        self.assertEqual(benchmarks.uncovered(scenarios), [])
+        self.assertEqual(sorted(s.name for s in scenarios), sorted(VIEW_BUDGETS))
+
+    def test_views_stay_within_budget(self):
+        # In-process indexes are warm in a running server; build them up front.
+        skill_registry.choices()
+        recommend.index.refresh(force=True)
+        recommend.freelancer_index.refresh(force=True)
+        fx = benchmarks.fixture()
+        clients = {}
+        for scenario in benchmarks.scenarios(fx):
+            max_queries, max_ms = VIEW_BUDGETS[scenario.name]
+            with self.subTest(scenario.name):
+                client = benchmarks._client_for(scenario, fx, clients)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = benchmarks._request(client, scenario)
+                self.assertLess(response.status_code, 400)
+                queries = ctx.captured_queries
+                sql_ms = sum(float(q["time"]) for q in queries) * 1000
+                if len(queries) > max_queries or sql_ms > max_ms:
+                    self.fail(
+                        f"{scenario.method.upper()} {scenario.path} ran {len(queries)} queries in "
+                        f"{sql_ms:.1f} ms (budget {max_queries} queries, {max_ms} ms). "
+                        f"Repeated statements:\n{describe(queries)}"
+                    )
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Two SQLite databases that never sync, so a read shows which one served it."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("ada", bio="old bio")
+        self.user.save(using="replica")  # as replicated so far
+
+    def test_reads_use_the_replica_and_writes_the_primary(self):
+        Project.objects.create(client=self.user, title="Fresh", description="…", budget=10)
+        self.assertFalse(Project.objects.exists())
+        self.assertTrue(Project.objects.using("default").exists())
+        with transaction.atomic():
+            self.assertTrue(Project.objects.exists())
+
+    def test_a_user_who_wrote_reads_the_primary_for_a_while(self):
+        profile = reverse("view_profile", args=["ada"])
+        self.assertNotIn("sessionid", self.client.get(profile).cookies)  # anonymous reads leave no session
+
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(profile), "old bio")
+        self.client.post(reverse("edit_profile", args=["ada"]), {"name": "Ada", "bio": "new bio"})
+        self.assertContains(self.client.get(profile), "new bio")
+
+        session = self.client.session
+        session[routing.SESSION_KEY] = time.time() - 1
+        session.save()
+        self.assertContains(self.client.get(profile), "old bio")
+
+    def test_a_skill_reload_reads_the_primary(self):
+        SkillTag.objects.create(name="Rust")  # not replicated yet
+        self.assertEqual(SkillRegistry().names(), ["Rust"])
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_cached_pages_and_fragments_hold_primary_rows_only(self):
+        default_cache.clear()
+        self.addCleanup(default_cache.clear)
+        project = Project.objects.create(client=self.user, title="Fresh title", description="…", budget=10)
+        Project(pk=project.pk, client=self.user, title="Stale title", description="…", budget=10).save(using="replica")
+        listing = reverse("project_list")
+
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(listing), "Stale title")  # the replica, and not cached
+        self.client.logout()
+        for _ in range(2):  # the miss renders from the primary; the hit serves that
+            self.assertContains(self.client.get(listing), "Fresh title")
+
+
+class ProposalAcceptanceTests(TransactionTestCase):
+    THREADS = 16
+    MAX_SECONDS = 5  # generous: a few hundred ms on a laptop
+
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user("owner", is_client=True)
+        self.project = Project.objects.create(client=self.owner, title="Race", description="…", budget=10)
+        self.proposals = [
+            Proposal.objects.create(
+                project=self.project,
+                freelancer=CustomUser.objects.create_user(f"bidder{i}", is_freelancer=True),
+                message="…",
+                proposed_price=10,
+            )
+            for i in range(self.THREADS)
+        ]
+
+    def test_second_accept_conflicts(self):
+        first, second = self.proposals[:2]
+        self.assertEqual(accept_proposal(first), ACCEPTED)
+        self.assertEqual(accept_proposal(second), CONFLICT)
+        self.assertEqual(
+            dict(Proposal.objects.values_list("pk", "status").filter(pk__in=[first.pk, second.pk])),
+            {first.pk: "accepted", second.pk: "rejected"},
+        )
+
+    def test_parallel_accepts_have_exactly_one_winner(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+
+        def accept(proposal):
+            try:
+                barrier.wait()
+                results.append(accept_proposal(proposal))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=accept, args=(p,)) for p in self.proposals]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(sorted(results), [ACCEPTED] + [CONFLICT] * (self.THREADS - 1))
+        statuses = list(Proposal.objects.filter(project=self.project).values_list("status", flat=True))
+        self.assertEqual(statuses.count("accepted"), 1)
+        self.assertEqual(statuses.count("rejected"), self.THREADS - 1)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).status, "ongoing")
+        # A loose ceiling that catches contention regressions, not a benchmark.
+        self.assertLess(elapsed, self.MAX_SECONDS, f"{self.THREADS} concurrent accepts took {elapsed:.2f}s")
+
+
+@override_settings(EXPORT_TOKEN="export-tests")
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user("acme", is_client=True)
+        python = SkillTag.objects.create(name="Python")
+        sql = SkillTag.objects.create(name="SQL")
+        cls.start = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        # Pairs share a created_at, so page boundaries fall inside ties.
+        cls.projects = [
+            Project.objects.create(
+                client=cls.owner, title=f"P{i}", description="…", budget=10 + i,
+                created_at=cls.start + timedelta(hours=i // 2),
+            )
+            for i in range(7)
+        ]
+        ProjectSkill.objects.bulk_create([
+            ProjectSkill(project=cls.projects[0], skill=sql),
+            ProjectSkill(project=cls.projects[0], skill=python),
+        ])
+
+    def get(self, path, **params):
+        return self.client.get(path, params, headers={"authorization": "Bearer export-tests"})
+
+    def test_csv_rows(self):
+        response = self.get(reverse("export", args=["projects", "csv"]))
+        self.assertEqual(response["Content-Type"], "text/csv")
+        header, *records = csv.reader(StringIO(b"".join(response.streaming_content).decode()))
+        self.assertEqual(header, export.columns("projects"))
+        self.assertEqual([r[header.index("title")] for r in records], [f"P{i}" for i in range(7)])
+        first = dict(zip(header, records[0]))
+        self.assertEqual(
+            (first["id"], first["budget"], first["client_username"], first["skills"]),
+            (str(self.projects[0].pk), "10.00", "acme", "Python;SQL"),
+        )
+
+    def test_since_filters_across_keyset_pages(self):
+        since = self.start + timedelta(hours=1)  # drops P0 and P1
+        for chunk_size in (1, 2, 3, 100):
+            with self.subTest(chunk_size=chunk_size):
+                titles = [r["title"] for r in export.rows("projects", since=since, chunk_size=chunk_size)]
+                self.assertEqual(titles, [f"P{i}" for i in range(2, 7)])
+
+        response = self.get(reverse("export", args=["projects", "csv"]), since=since.isoformat())
+        header, *records = csv.reader(StringIO(b"".join(response.streaming_content).decode()))
+        self.assertEqual([r[header.index("title")] for r in records], [f"P{i}" for i in range(2, 7)])
+        self.assertEqual(self.get(reverse("export", args=["projects", "csv"]), since="yesterday").status_code, 400)
+
+
+class ProjectImportTests(TestCase):
+    CSV = (
+        "title,description,budget,skills\n"
+        "Shop,Build a store,500,django; React\n"
+        ",No title,10,\n"
+        "API,REST backend,abc,Python\n"
+        "ETL,\"Nightly, incremental\",250.5,Python;SQL\n"
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user("importer", is_client=True)
+        SkillTag.objects.create(name="Django")
+
+    def test_valid_rows_are_imported_in_batches_and_bad_rows_reported(self):
+        result = importer.import_projects(self.owner, StringIO(self.CSV), "csv", batch_size=1)
+        self.assertEqual((result.created, result.failed), (2, 2))
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+        self.assertEqual(result.skills_created, 3)
+        self.assertEqual(
+            sorted(ProjectSkill.objects.values_list("project__title", "skill__name")),
+            [("ETL", "Python"), ("ETL", "SQL"), ("Shop", "Django"), ("Shop", "React")],
+        )
+        self.assertEqual(ProjectSearchDocument.objects.get(project__title="Shop").skills_text, "Django React")
+
+    def test_skills_added_by_a_concurrent_import_are_not_counted(self):
+        skill_registry.choices()
+        SkillTag.objects.bulk_create([SkillTag(name="Rust")])  # another process, unseen by the registry
+        ids, created = importer.resolve_skills(["Rust", "Go", "Django"])
+        self.assertEqual(created, 1)
+        self.assertEqual(ids, {n.lower(): SkillTag.objects.get(name=n).pk for n in ("Rust", "Go", "Django")})
+
+    def test_ndjson_upload(self):
+        self.client.force_login(self.owner)
+        upload = SimpleUploadedFile(
+            "projects.ndjson",
+            b'{"title": "Bot", "description": "Chat bot", "budget": 80, "skills": ["Python"]}\n[1, 2]\n',
+        )
+        response = self.client.post(reverse("import_projects"), {"file": upload})
+        self.assertContains(response, "Imported 1 project")
+        self.assertContains(response, "Line 2: Expected a JSON object.")
+        self.assertTrue(Project.objects.filter(client=self.owner, title="Bot").exists())
+
+    def test_bulk_create_keeps_preset_created_at(self):
+        posted = timezone.now() - timedelta(days=30)
+        preset, fresh = Project.objects.bulk_create([
+            Project(client=self.owner, title="Old", description="d", budget=1, created_at=posted),
+            Project(client=self.owner, title="New", description="d", budget=1),
+        ])
+        self.assertEqual(Project.objects.get(pk=preset.pk).created_at, posted)
+        self.assertGreater(Project.objects.get(pk=fresh.pk).created_at, posted + timedelta(days=29))
@@ -0,0 +1,125 @@
+"""Thumbnails of profile pictures, generated off the request path.
+
+Saving a new picture queues a "thumbnails" job (see core.jobs). The job
+worker hands the resizing to a process pool, so decoding and resampling run
+on every core instead of contending for one interpreter. Rendering happens
+outside the job's transaction; only recording the variants on
+``CustomUser.picture_variants`` runs inside it::
+
+    {"64": {"webp": "profile_pics/thumbs/ada.64.webp", "jpeg": "profile_pics/thumbs/ada.64.jpg"}, ...}
+
+Variants sit beside the original, in a ``thumbs`` directory of the same
+storage that uploads can never write to. Templates pick the smallest
+adequate one with ``{% avatar %}`` from core.templatetags.avatars.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from . import imaging, jobs
+from .models import CustomUser
+from .signals import bump_on_commit
+
+SIZES = (64, 128, 256)
+FORMATS = ("webp", "jpeg")
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+THUMBS_DIR = "thumbs"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool(workers=None):
+    """The shared process pool, started on first use with ``workers`` processes
+    (default ``settings.THUMBNAIL_WORKERS``, else one per CPU)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads and holds DB connections is unsafe.
+            _pool = ProcessPoolExecutor(
+                max_workers=workers or getattr(settings, "THUMBNAIL_WORKERS", None) or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def variant_name(name, size, fmt):
+    directory, base = os.path.split(name)
+    stem, _ = os.path.splitext(base)
+    return f"{directory}/{THUMBS_DIR}/{stem}.{size}.{EXTENSIONS[fmt]}".lstrip("/")
+
+
+def pick(variants, pixels):
+    """The smallest variant size (as stored, a string) of at least ``pixels``, else the largest."""
+    sizes = sorted(int(s) for s in variants)
+    if not sizes:
+        return None
+    return str(next((s for s in sizes if s >= pixels), sizes[-1]))
+
+
+def submit(storage, name):
+    """Start rendering every variant of ``name`` in the pool; returns the Future."""
+    targets = {(size, fmt): storage.path(variant_name(name, size, fmt)) for size in SIZES for fmt in FORMATS}
+    os.makedirs(os.path.dirname(next(iter(targets.values()))), exist_ok=True)
+    return pool().submit(imaging.render, storage.path(name), targets)
+
+
+def variants_of(name, written):
+    """The ``picture_variants`` value for the ``(size, format)`` keys rendered from ``name``."""
+    variants = {}
+    for size, fmt in written:
+        variants.setdefault(str(size), {})[fmt] = variant_name(name, size, fmt)
+    return variants
+
+
+def generate(storage, name):
+    return variants_of(name, submit(storage, name).result())
+
+
+def save_variants(user_id, name, variants):
+    """Record ``variants`` unless the user has since replaced ``name``; returns whether it did."""
+    updated = CustomUser.objects.filter(pk=user_id, profile_picture=name).update(picture_variants=variants)
+    if updated:
+        # update() sends no signals; listing pages show the avatars.
+        bump_on_commit("users")
+    return bool(updated)
+
+
+def delete_variants(storage, variants):
+    for formats in variants.values():
+        for variant in formats.values():
+            storage.delete(variant)
+
+
+def schedule(user, stale=None):
+    """Queue thumbnails for ``user``'s current picture and removal of ``stale`` variants."""
+    name = user.profile_picture.name if user.profile_picture else ""
+    jobs.enqueue(
+        "thumbnails",
+        {"user_id": user.pk, "name": name, "stale": stale or {}},
+        key=f"thumbnails:{user.pk}:{name}" if name else None,
+    )
+
+
+@jobs.handler("thumbnails", staged=True)
+def _thumbnails_job(payload):
+    storage = CustomUser._meta.get_field("profile_picture").storage
+    delete_variants(storage, payload.get("stale") or {})
+    name = payload["name"]
+    if not name or not storage.exists(name):
+        return None
+    # Outside a transaction reads go to a replica, which may not have the upload yet.
+    current = CustomUser.objects.using(DEFAULT_DB_ALIAS).filter(pk=payload["user_id"], profile_picture=name)
+    if not current.exists():
+        return None  # replaced before we got to it; that upload queued its own job
+    variants = generate(storage, name)
+
+    def write():
+        if not save_variants(payload["user_id"], name, variants):
+            delete_variants(storage, variants)  # the picture changed while we worked
+
+    return write
@@ -10,20 +10,30 @@ urlpatterns = [
     path("logout/", views.logout_view, name="logout"),
 
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("api/recommendations/", views.recommended_projects_api, name="recommended_projects_api"),
     path("post-project/", views.post_project, name="post_project"),
+    path("projects/import/", views.import_projects, name="import_projects"),
     path("projects/", views.project_list, name="project_list"),
+    path("api/projects/", views.project_list_api, name="project_list_api"),
+    path("api/projects/search/", views.project_search_api, name="project_search_api"),
     path("projects/<int:project_id>/", views.project_detail, name="project_detail"),
     path("projects/<int:project_id>/propose/", views.submit_proposal, name="submit_proposal"),
     path("projects/<int:project_id>/proposals/", views.view_proposals, name="view_proposals"),
 
     path("inbox/", views.inbox, name="inbox"),
     path("chat/<str:username>/", views.chat_detail, name="chat_detail"),
+    path("chat/<str:username>/messages/", views.chat_messages, name="chat_messages"),
+    path("attachments/<int:message_id>/", views.message_attachment, name="message_attachment"),
 
     path("proposals/<int:proposal_id>/update/", views.update_proposal_status, name="update_proposal_status"),
     path("proposals/<int:proposal_id>/review/", views.submit_review, name="submit_review"),
 
     path("profile/<str:username>/", views.view_profile, name="view_profile"),
     path("profile/<str:username>/edit/", views.edit_profile, name="edit_profile"),
+    path("profile/<str:username>/picture/", views.profile_picture, name="profile_picture"),
 
     path("freelancers/", views.browse_freelancers, name="browse_freelancers"),
+
+    path("metrics", views.metrics_view, name="metrics"),
+    path("export/<slug:kind>.<slug:fmt>", views.export_view, name="export"),
 ]
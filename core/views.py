@@ -1,3 +1,9 @@
+import hmac
+import io
+import os
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import login, logout
@@ -5,26 +11,49 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.views.decorators.cache import never_cache
-from django.http import HttpResponseForbidden
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Avg, Q
-from django.db import models
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from .models import (
     CustomUser,
     Project,
     Proposal,
     Review,
-    SkillTag,
     Message,
     ProjectSkill,
+    Conversation,
+    FreelancerStats,
+    conversation_key,
 )
+from .listings import PROJECT_FIELDS, freelancer_values, load_freelancers, load_projects
+from .messaging import deliver, notify
+from .pagination import keyset_filter, keyset_page
+from .proposals import ACCEPTED, CONFLICT, accept_proposal, reject_proposal
+from . import export, importer, media, metrics, recommend
+from .cache import cache_public_page
+from .search import index_freelancer, index_project, record_review, search_projects
+from .signals import bump_on_commit
+from .skills import registry as skill_registry
+from .storage import digest_of
 from .forms import (
     ProjectForm,
     ProposalForm,
     MessageForm,
     ReviewForm,
     ProfileForm,
+    ProjectImportForm,
 )
 
 
@@ -34,6 +63,7 @@ def start(request):
     return redirect('login')
 
 
+@cache_public_page()
 def home(request):
     return render(request, 'core/home.html')
 
@@ -59,6 +89,7 @@ def register(request):
             else:
                 user.is_freelancer = True
             user.save()
+            index_freelancer(user)
             login(request, user)
             return redirect('dashboard')
         except Exception:
@@ -84,22 +115,40 @@ def login_view(request):
     return render(request, 'core/login.html', {'form': form})
 
 
+DASHBOARD_PROJECTS = 25
+RECENT_PROPOSALS_ON_DASHBOARD = 20
+RECOMMENDED_ON_DASHBOARD = 10
+
+
 @never_cache
 @login_required
 def dashboard(request):
     user = request.user
 
     if user.is_client:
-        projects = Project.objects.filter(client=user).order_by('-created_at')
+        # One GROUP BY over the page of projects, served by proposal_project_status_idx.
+        projects, next_cursor = keyset_page(
+            Project.objects.filter(client=user)
+            .values("id", "title", "description", "status", "created_at")
+            .annotate(
+                pending=Count("proposals", filter=Q(proposals__status="pending")),
+                accepted=Count("proposals", filter=Q(proposals__status="accepted")),
+                rejected=Count("proposals", filter=Q(proposals__status="rejected")),
+            ),
+            ("created_at", "id"),
+            cursor=request.GET.get("cursor"),
+            size=DASHBOARD_PROJECTS,
+        )
         proposals = (
             Proposal.objects
             .filter(project__client=user)
             .select_related('project', 'freelancer')
-            .order_by('-submitted_at')
+            .order_by('-submitted_at', '-id')[:RECENT_PROPOSALS_ON_DASHBOARD]
         )
         return render(request, 'core/client_dashboard.html', {
             'user': user,
             'projects': projects,
+            'next_cursor': next_cursor,
             'proposals': proposals,
         })
 
@@ -107,7 +156,7 @@ def dashboard(request):
         proposals = (
             Proposal.objects
             .filter(freelancer=user)
-            .select_related('project')
+            .select_related('project', 'project__client')
             .order_by('-submitted_at')
         )
         reviews = Review.objects.filter(
@@ -117,11 +166,36 @@ def dashboard(request):
             'user': user,
             'proposals': proposals,
             'reviews': reviews,
+            'recommended': recommend.for_freelancer(user, k=RECOMMENDED_ON_DASHBOARD),
         })
 
     return redirect('home')
 
 
+@never_cache
+@login_required
+def recommended_projects_api(request):
+    if not request.user.is_freelancer:
+        return HttpResponseForbidden("Recommendations are for freelancers.")
+    try:
+        k = int(request.GET.get("k", RECOMMENDED_ON_DASHBOARD))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid k.")
+    return JsonResponse({
+        "results": [
+            {
+                "id": row.id,
+                "title": row.title,
+                "budget": str(row.budget),
+                "created_at": row.created_at.isoformat(),
+                "skills": row.skills,
+                "score": score,
+            }
+            for row, score in recommend.for_freelancer(request.user, k=k)
+        ],
+    })
+
+
 def logout_view(request):
     logout(request)
     return redirect('login')
@@ -141,11 +215,12 @@ def post_project(request):
                 project.save()
 
                 ProjectSkill.objects.filter(project=project).delete()
-                skills_qs = form.cleaned_data.get("skills")
-                if skills_qs:
+                skill_ids = form.cleaned_data.get("skills")
+                if skill_ids:
                     ProjectSkill.objects.bulk_create(
-                        [ProjectSkill(project=project, skill=s) for s in skills_qs]
+                        [ProjectSkill(project=project, skill_id=s) for s in skill_ids]
                     )
+                index_project(project, skill_registry.names(skill_ids or []))
 
             return redirect("project_list")
     else:
@@ -154,33 +229,173 @@ def post_project(request):
     return render(request, "core/post_project.html", {"form": form})
 
 
-def project_list(request):
+IMPORT_ERRORS_SHOWN = 50
+
+
+@login_required
+def import_projects(request):
+    if not getattr(request.user, "is_client", False):
+        return redirect("dashboard")
+
+    result = None
+    if request.method == "POST":
+        form = ProjectImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            fmt = form.cleaned_data["format"] or importer.detect_format(upload.name)
+            # Decode the upload as it is read instead of loading it whole.
+            lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace", newline="")
+            result = importer.import_projects(request.user, lines, fmt)
+    else:
+        form = ProjectImportForm()
+
+    return render(request, "core/import_projects.html", {
+        "form": form,
+        "result": result,
+        "errors": result.errors[:IMPORT_ERRORS_SHOWN] if result else [],
+    })
+
+
+PROJECT_PAGE_SIZE = 20
+SEARCH_MAX_PAGES = 50
+
+
+def _filtered_projects(request):
     skill_filter = request.GET.get('skill')
     status_filter = request.GET.get('status')
 
     projects = Project.objects.all()
 
     if skill_filter:
-        projects = projects.filter(
-            projectskill__skill__name__iexact=skill_filter
-        )
+        skill_id = skill_registry.id_for(skill_filter)
+        if skill_id is None:
+            return projects.none()
+        projects = projects.filter(projectskill__skill_id=skill_id)
 
     if status_filter in ["new", "ongoing", "completed"]:
         projects = projects.filter(status=status_filter)
 
-    projects = projects.order_by('-created_at')
-    skills = SkillTag.objects.order_by('name')
+    return projects
+
+
+def _project_page(request, projects):
+    # Keyset on (created_at, id): served from proj_status_created_idx /
+    # proj_created_idx, and page 50 costs the same as page 1.
+    return keyset_page(
+        projects,
+        ("created_at", "id"),
+        cursor=request.GET.get("cursor"),
+        size=PROJECT_PAGE_SIZE,
+    )
+
+
+def _search_page(request):
+    """Relevance-ranked page for ``?q=``; returns (rows, scores, next_page)."""
+    try:
+        page = max(1, min(int(request.GET.get("page", 1)), SEARCH_MAX_PAGES))
+    except ValueError:
+        page = 1
+    status = request.GET.get("status")
+    hits = search_projects(
+        request.GET.get("q"),
+        skill=request.GET.get("skill"),
+        status=status if status in ["new", "ongoing", "completed"] else None,
+        limit=PROJECT_PAGE_SIZE + 1,
+        offset=(page - 1) * PROJECT_PAGE_SIZE,
+    )
+    has_next = len(hits) > PROJECT_PAGE_SIZE and page < SEARCH_MAX_PAGES
+    hits = hits[:PROJECT_PAGE_SIZE]
+
+    rows = {r.id: r for r in load_projects(
+        Project.objects.filter(id__in=[pid for pid, _ in hits]).values(*PROJECT_FIELDS)
+    )}
+    ranked = [rows[pid] for pid, _ in hits if pid in rows]
+    scores = {pid: score for pid, score in hits}
+    return ranked, scores, page + 1 if has_next else None
+
+
+@cache_public_page("projects", "skills")
+def project_list(request):
+    params = request.GET.copy()
+    next_query = None
+
+    if request.GET.get('q', '').strip():
+        projects, _, next_page = _search_page(request)
+        if next_page:
+            params['page'] = next_page
+            next_query = params.urlencode()
+    else:
+        records, next_cursor = _project_page(
+            request, _filtered_projects(request).values(*PROJECT_FIELDS)
+        )
+        projects = load_projects(records)
+        if next_cursor:
+            params['cursor'] = next_cursor
+            next_query = params.urlencode()
+
+    skills = skill_registry.names()
 
     return render(request, 'core/project_list.html', {
         'projects': projects,
-        'skills': skills
+        'skills': skills,
+        'next_query': next_query,
     })
 
 
+def project_list_api(request):
+    records, next_cursor = _project_page(
+        request, _filtered_projects(request).values(*PROJECT_FIELDS)
+    )
+    projects = load_projects(records)
+    return JsonResponse({
+        "results": [
+            {
+                "id": p.id,
+                "title": p.title,
+                "description": p.description,
+                "budget": str(p.budget),
+                "status": p.status,
+                "created_at": p.created_at.isoformat(),
+                "skills": p.skills,
+            }
+            for p in projects
+        ],
+        "next_cursor": next_cursor,
+    })
+
+
+def project_search_api(request):
+    projects, scores, next_page = _search_page(request)
+    return JsonResponse({
+        "results": [
+            {
+                "id": p.id,
+                "title": p.title,
+                "description": p.description,
+                "budget": str(p.budget),
+                "status": p.status,
+                "created_at": p.created_at.isoformat(),
+                "skills": p.skills,
+                "score": scores[p.id],
+            }
+            for p in projects
+        ],
+        "next_page": next_page,
+    })
+
+
+SUGGESTED_FREELANCERS = 8
+
+
+@cache_public_page("projects", "skills", "users")
 def project_detail(request, project_id):
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.select_related("client"), id=project_id)
+    suggested = None
+    if project.status == "new" and request.user.is_authenticated and project.client_id == request.user.pk:
+        suggested = recommend.freelancers_for_project(project, k=SUGGESTED_FREELANCERS)
     return render(request, 'core/project_detail.html', {
         'project': project,
+        'suggested': suggested,
     })
 
 
@@ -202,10 +417,11 @@ def submit_proposal(request, project_id):
             proposal.save()
 
             # Optional: seed a chat message to the client when a proposal is submitted
-            Message.objects.create(
+            notify(
                 sender=request.user,
                 receiver=project.client,
-                text=f"Hello {project.client.username}, I just submitted a proposal for “{project.title}”."
+                text=f"Hello {project.client.username}, I just submitted a proposal for “{project.title}”.",
+                key=f"proposal-submitted:{proposal.pk}",
             )
 
             messages.success(request, "Proposal submitted successfully!")
@@ -215,6 +431,9 @@ def submit_proposal(request, project_id):
 
     return render(request, "core/submit_proposal.html", {"form": form, "project": project})
 
+PROPOSAL_PAGE_SIZE = 20
+
+
 @never_cache
 @login_required
 def view_proposals(request, project_id):
@@ -223,8 +442,17 @@ def view_proposals(request, project_id):
     if request.user != project.client:
         return redirect('dashboard')
 
-    proposals = Proposal.objects.filter(project=project).order_by('-submitted_at')
-    return render(request, 'core/view_proposals.html', {'project': project, 'proposals': proposals})
+    proposals, next_cursor = keyset_page(
+        Proposal.objects.filter(project=project).select_related('freelancer', 'review'),
+        ("submitted_at", "id"),
+        cursor=request.GET.get("cursor"),
+        size=PROPOSAL_PAGE_SIZE,
+    )
+    context = {'project': project, 'proposals': proposals, 'next_cursor': next_cursor}
+    # The client dashboard loads each project's list into the page, a page at a time.
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return render(request, 'core/proposal_items.html', context)
+    return render(request, 'core/view_proposals.html', context)
 
 
 @never_cache
@@ -232,43 +460,34 @@ def view_proposals(request, project_id):
 def inbox(request):
     user = request.user
 
-    partner_ids = set()
+    paginator = Paginator(Conversation.objects.for_user(user), 25)
+    page = paginator.get_page(request.GET.get("page"))
+    chats = [
+        {
+            "user": c.partner_for(user),
+            "last": c.last_message_at,
+            "preview": c.last_message_preview,
+            "from_me": c.last_sender_id == user.pk,
+            "count": c.message_count,
+        }
+        for c in page
+    ]
 
-    if user.is_client:
-        partner_ids.update(
-            Proposal.objects.filter(project__client=user)
-            .values_list("freelancer_id", flat=True)
-        )
-    if user.is_freelancer:
-        partner_ids.update(
-            Proposal.objects.filter(freelancer=user)
-            .values_list("project__client_id", flat=True)
-        )
-
-    partner_ids.update(
-        Message.objects.filter(sender=user).values_list("receiver_id", flat=True)
-    )
-    partner_ids.update(
-        Message.objects.filter(receiver=user).values_list("sender_id", flat=True)
-    )
+    return render(request, "core/inbox.html", {"chats": chats, "page": page})
 
-    partners = CustomUser.objects.filter(pk__in=partner_ids)
 
-    from django.db.models import Max, Q
-    rows = []
-    for p in partners:
-        last = (
-            Message.objects.filter(
-                Q(sender=user, receiver=p) | Q(sender=p, receiver=user)
-            ).aggregate(last=Max("timestamp"))["last"]
-        )
-        rows.append((p, last))
-
-    rows.sort(key=lambda x: (x[1] is None, x[1]), reverse=True)
-    chats = [{"user": u, "last": ts} for u, ts in rows]
+CHAT_PAGE_SIZE = 50
 
-    return render(request, "core/inbox.html", {"chats": chats})
 
+def _message_json(m, usernames):
+    return {
+        "id": m.id,
+        "sender": usernames.get(m.sender_id, ""),
+        "text": m.text,
+        "attachment": reverse("message_attachment", args=[m.id]) if m.attachment else None,
+        "attachment_name": m.attachment_name,
+        "timestamp": m.timestamp.isoformat(),
+    }
 
 
 @never_cache
@@ -276,11 +495,7 @@ def inbox(request):
 def chat_detail(request, username):
     other_user = get_object_or_404(CustomUser, username=username)
     user = request.user
-
-    msgs = Message.objects.filter(
-        Q(sender=user, receiver=other_user) |
-        Q(sender=other_user, receiver=user)
-    ).order_by('timestamp')
+    wants_json = request.headers.get("x-requested-with") == "XMLHttpRequest"
 
     if request.method == 'POST':
         form = MessageForm(request.POST, request.FILES)
@@ -288,50 +503,99 @@ def chat_detail(request, username):
             m = form.save(commit=False)
             m.sender = user
             m.receiver = other_user
-            m.save()
+            deliver(m)
+            if wants_json:
+                usernames = {user.pk: user.username}
+                return JsonResponse({"message": _message_json(m, usernames)}, status=201)
             return redirect('chat_detail', username=other_user.username)
+        if wants_json:
+            return JsonResponse({"errors": form.errors}, status=400)
     else:
         form = MessageForm()
 
+    # Newest page first, then flipped so the template reads top to bottom.
+    msgs, older_cursor = keyset_page(
+        Message.objects.filter(conversation_key=conversation_key(user.pk, other_user.pk))
+        .select_related('sender'),
+        ("timestamp", "id"),
+        cursor=request.GET.get("before"),
+        size=CHAT_PAGE_SIZE,
+    )
+    msgs.reverse()
+
     return render(request, 'core/chat_detail.html', {
-        'messages': msgs,
+        'chat_messages': msgs,
+        'older_cursor': older_cursor,
         'form': form,
         'other_user': other_user,
     })
 
 
+@never_cache
+@login_required
+def chat_messages(request, username):
+    """Messages newer than ``?after=<id>``, for polling from the chat page."""
+    other_user = get_object_or_404(CustomUser, username=username)
+    user = request.user
+    key = conversation_key(user.pk, other_user.pk)
+
+    try:
+        after_id = int(request.GET.get("after", 0))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid 'after' id.")
+
+    msgs = Message.objects.filter(conversation_key=key)
+    if after_id:
+        after_ts = msgs.filter(pk=after_id).values_list("timestamp", flat=True).first()
+        if after_ts is None:
+            return HttpResponseBadRequest("Unknown 'after' id.")
+        msgs = keyset_filter(msgs, ("timestamp", "id"), (after_ts, after_id), descending=False)
+    msgs = list(msgs.order_by("timestamp", "id")[:CHAT_PAGE_SIZE])
+
+    usernames = {user.pk: user.username, other_user.pk: other_user.username}
+    return JsonResponse({
+        "messages": [_message_json(m, usernames) for m in msgs],
+        "last_id": msgs[-1].id if msgs else after_id,
+    })
+
+
 @never_cache
 @login_required
 @require_POST
-@transaction.atomic
 def update_proposal_status(request, proposal_id):
-    proposal = get_object_or_404(Proposal, id=proposal_id)
+    proposal = get_object_or_404(Proposal.objects.select_related("project", "freelancer"), id=proposal_id)
 
-    if proposal.project.client != request.user:
+    if proposal.project.client_id != request.user.pk:
         return HttpResponseForbidden("You do not have permission to modify this proposal.")
 
     action = request.POST.get("action")
 
     if action == "accept":
-        # 1) accept this proposal
-        Proposal.objects.filter(pk=proposal.id).update(status="accepted")
-        # 2) mark project ongoing
-        Project.objects.filter(pk=proposal.project_id).update(status="ongoing")
-        # 3) reject all other proposals for this project
-        Proposal.objects.filter(project_id=proposal.project_id).exclude(pk=proposal.id).update(status="rejected")
-
-        # 4) seed a chat (NO 'project' kwarg anymore)
-        Message.objects.create(
-            sender=request.user,
-            receiver=proposal.freelancer,
-            text=f"Hi {proposal.freelancer.username}, I’ve accepted your proposal for “{proposal.project.title}”."
-        )
-
-        messages.success(request, "Proposal accepted. Project is now ongoing.")
+        # The job row commits with the acceptance, or not at all.
+        with transaction.atomic():
+            result = accept_proposal(proposal)
+            if result == ACCEPTED:
+                # queryset updates send no signals, so invalidate cached listings here
+                bump_on_commit("projects")
+                notify(
+                    sender=request.user,
+                    receiver=proposal.freelancer,
+                    text=f"Hi {proposal.freelancer.username}, I’ve accepted your proposal for “{proposal.project.title}”.",
+                    key=f"proposal-accepted:{proposal.pk}",
+                )
+
+        if result == ACCEPTED:
+            messages.success(request, "Proposal accepted. Project is now ongoing.")
+        elif result == CONFLICT:
+            messages.error(request, "Another proposal was already accepted for this project.")
+        else:
+            messages.error(request, "This proposal is no longer pending.")
 
     elif action == "reject":
-        Proposal.objects.filter(pk=proposal.id).update(status="rejected")
-        messages.info(request, "Proposal rejected.")
+        if reject_proposal(proposal):
+            messages.info(request, "Proposal rejected.")
+        else:
+            messages.error(request, "This proposal is no longer pending.")
 
     return redirect("dashboard")
 
@@ -356,17 +620,19 @@ def submit_review(request, proposal_id):
             review = form.save(commit=False)
             review.proposal = proposal
             review.save()
+            record_review(review)
 
             # Mark project completed
             project = proposal.project
             project.status = 'completed'
-            project.save(update_fields=['status'])
+            project.save(update_fields=['status', 'updated_at'])
 
             # 🔔 Notify freelancer (NO 'project=' kwarg here)
-            Message.objects.create(
+            notify(
                 sender=request.user,
                 receiver=proposal.freelancer,
-                text=f"{request.user.username} left a {review.rating}/5 review on '{project.title}': {review.comment}"
+                text=f"{request.user.username} left a {review.rating}/5 review on '{project.title}': {review.comment}",
+                key=f"review-left:{review.pk}",
             )
 
             messages.success(request, "Review submitted. Project marked as completed.")
@@ -380,24 +646,34 @@ def submit_review(request, proposal_id):
     })
 
 
+REVIEW_PAGE_SIZE = 10
+
+
 @never_cache
 @login_required
 def view_profile(request, username):
     profile_user = get_object_or_404(CustomUser, username=username)
 
     reviews = []
-    avg_rating = None
+    stats = None
+    older_cursor = None
     if profile_user.is_freelancer:
-        reviews = Review.objects.filter(
-            proposal__freelancer=profile_user
-        ).select_related("proposal__project", "proposal__freelancer")
-        if reviews.exists():
-            avg_rating = reviews.aggregate(models.Avg("rating"))["rating__avg"]
+        stats = FreelancerStats.objects.filter(user=profile_user).first()
+        reviews, older_cursor = keyset_page(
+            Review.objects.filter(proposal__freelancer=profile_user)
+            .select_related("proposal__project"),
+            ("created_at", "id"),
+            cursor=request.GET.get("cursor"),
+            size=REVIEW_PAGE_SIZE,
+        )
 
     return render(request, "core/view_profile.html", {
         "profile_user": profile_user,
+        "skills": list(profile_user.skills.all()),
         "reviews": reviews,
-        "avg_rating": avg_rating,
+        "older_cursor": older_cursor,
+        "stats": stats,
+        "avg_rating": stats.avg_rating if stats and stats.review_count else None,
     })
 
 
@@ -410,7 +686,7 @@ def edit_profile(request, username):
         return HttpResponseForbidden("You can only edit your own profile.")
 
     if request.method == 'POST':
-        form = ProfileForm(request.POST, instance=user)
+        form = ProfileForm(request.POST, request.FILES, instance=user)
         if form.is_valid():
             form.save()
             return redirect('view_profile', username=user.username)
@@ -420,26 +696,104 @@ def edit_profile(request, username):
     return render(request, 'core/edit_profile.html', {'form': form})
 
 
+FREELANCER_PAGE_SIZE = 24
+
+
+@cache_public_page("users", "skills", "reviews")
 def browse_freelancers(request):
     query = request.GET.get('q', '')
 
-    freelancers = (
-        CustomUser.objects
-        .filter(is_freelancer=True)
-        .annotate(avg_rating=Avg('proposal__review__rating'))  # rating from accepted/completed reviews
-        .prefetch_related('skills')
-    )
+    freelancers = FreelancerStats.objects.all()
 
     if query:
         freelancers = freelancers.filter(
             Q(username__icontains=query) |
             Q(location__icontains=query) |
-            Q(skills__name__icontains=query)
-        ).distinct()
+            Q(skills_text__icontains=query.lower())
+        )
+
+    # Sorted by the stored rating, served from fstats_rating_idx.
+    records, next_cursor = keyset_page(
+        freelancer_values(freelancers),
+        ("avg_rating", "user_id"),
+        cursor=request.GET.get('cursor'),
+        size=FREELANCER_PAGE_SIZE,
+    )
 
-    freelancers = freelancers.order_by('-avg_rating', 'username')
+    next_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_query = params.urlencode()
 
     return render(request, 'core/browse_freelancers.html', {
-        'freelancers': freelancers,
+        'freelancers': load_freelancers(records),
         'query': query,
-    })
\ No newline at end of file
+        'next_query': next_query,
+    })
+
+
+@never_cache
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden("Invalid metrics token.")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _parse_since(value):
+    try:
+        since = parse_datetime(value) if value else None
+    except ValueError:
+        return None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+@never_cache
+def export_view(request, kind, fmt):
+    token = settings.EXPORT_TOKEN
+    if not token or not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden("Invalid export token.")
+    if kind not in export.EXPORTS or fmt not in export.FORMATS:
+        raise Http404("Unknown export.")
+    since = _parse_since(request.GET.get("since"))
+    if request.GET.get("since") and since is None:
+        return HttpResponseBadRequest("Invalid since timestamp.")
+    response = StreamingHttpResponse(export.stream(kind, fmt, since), content_type=export.FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
+ATTACHMENT_CACHE_CONTROL = "private, max-age=86400"  # a message's attachment never changes
+PICTURE_CACHE_CONTROL = "public, max-age=300"
+
+
+@login_required
+def message_attachment(request, message_id):
+    # Only the two people in the conversation; anyone else gets a 404, not a 403.
+    message = get_object_or_404(
+        Message.objects.filter(Q(sender=request.user) | Q(receiver=request.user))
+        .only("attachment", "attachment_name"),
+        pk=message_id,
+    )
+    if not message.attachment:
+        raise Http404("No attachment.")
+    name = message.attachment.name
+    return media.serve(
+        request, message.attachment.storage, name, etag=digest_of(name),
+        filename=message.attachment_name or os.path.basename(name), as_attachment=True,
+        cache_control=ATTACHMENT_CACHE_CONTROL,
+    )
+
+
+def profile_picture(request, username):
+    """The picture, or with ``?size=&format=`` one of its thumbnails once they exist."""
+    user = get_object_or_404(CustomUser.objects.only("profile_picture", "picture_variants"), username=username)
+    if not user.profile_picture:
+        raise Http404("No profile picture.")
+    name = user.picture_variants.get(request.GET.get("size", ""), {}).get(request.GET.get("format", ""))
+    return media.serve(
+        request, user.profile_picture.storage, name or user.profile_picture.name, cache_control=PICTURE_CACHE_CONTROL,
+    )
@@ -33,6 +33,7 @@ ALLOWED_HOSTS = []
 # freelance/settings.py
 
 INSTALLED_APPS = [      
+    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -46,8 +47,10 @@ AUTH_USER_MODEL = 'core.CustomUser'
 
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.routing.PrimaryStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -93,8 +96,44 @@ DATABASES = {
     }
 }
 
+# Read replicas of 'default' as comma-separated "host[:port]". core.routing sends
+# reads to them and keeps a user on the primary for REPLICA_STICKY_SECONDS after
+# they write, so they always see their own changes.
+for i, address in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{i}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+
+# Local-memory cache by default; point DJANGO_CACHE_DIR at a shared directory to
+# use the file-based backend so several worker processes see the same entries.
+# Production needs a shared cache: the skill registry and page caches learn of
+# writes in other processes through it (system check core.E001).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'freelance',
+    }
+}
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+    }
 
+# /metrics: statements slower than this are sampled. Scrapers must send
+# METRICS_TOKEN as "Authorization: Bearer <token>"; /metrics is disabled while unset.
+METRICS_SLOW_QUERY_MS = 200
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
 
+# Bearer token for the /export/ endpoints; exports are disabled while unset.
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN', '')
 
 
 # Password validation
@@ -143,6 +182,14 @@ AUTH_USER_MODEL = 'core.CustomUser'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Attachments (to the two people in the chat only) and profile pictures are
+# served through core.media. In production, set this to an internal nginx location aliased to
+# MEDIA_ROOT (e.g. "/protected-media/") so nginx streams the file itself.
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+
+# Processes each job worker uses to resize profile pictures (core.thumbnails); 0 means one per CPU.
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', '0'))
+
 # Auth redirects
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
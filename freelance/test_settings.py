@@ -0,0 +1,34 @@
+"""Settings for the test suite: local SQLite databases, so it does not need the MySQL server.
+
+``manage.py test`` uses this module unless DJANGO_SETTINGS_MODULE or
+``--settings`` says otherwise; other runners should point
+DJANGO_SETTINGS_MODULE at ``freelance.test_settings``.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test.sqlite3',
+        # Writers take the database lock up front, like row locks on
+        # MySQL, so concurrent tests queue instead of failing to upgrade.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        # A file rather than in-memory, so threads in concurrency tests
+        # open real connections to the same database.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    },
+    # A second, separately written database for the read-replica tests,
+    # which enable it with override_settings(DATABASE_REPLICAS=['replica']).
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_replica.sqlite3',
+        'TEST': {'NAME': BASE_DIR / 'test_replica_db.sqlite3'},
+    },
+}
+DATABASE_REPLICAS = []
+
+# Page caching is exercised explicitly by its own tests.
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+# The suite runs in one process, so a process-local cache is fine.
+SILENCED_SYSTEM_CHECKS = ['core.E001']